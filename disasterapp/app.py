@@ -1,14 +1,16 @@
 import streamlit as st
 import pandas as pd
 import folium
+from folium.plugins import HeatMap
 from streamlit_folium import st_folium 
 from datetime import datetime, timedelta
 import time
 import hashlib
 import json
 
-from utils.news_api import NewsDataCollector
-from utils.data_processor import DataProcessor
+from utils.ingest_jobs import IngestJobManager
+from utils import geohash
+from utils.event_frames import EVENT_PROJECTION, build_event_frame, build_location_frame, join_location_names
 from models.database import Database
 
 # Initialize session state for login functionality
@@ -16,6 +18,18 @@ if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
     st.session_state.username = None
 
+@st.cache_resource
+def get_ingest_job_manager():
+    # Shared by all sessions of this server so the worker thread outlives reruns
+    return IngestJobManager(Database())
+
+@st.cache_resource(show_spinner=False)
+def prepare_database():
+    # Create indexes and the capped latest-events feed once per server
+    db = Database()
+    db.ensure_indexes()
+    db.warm_local_search_index()
+
 def setup_app():
     st.set_page_config(
         page_title="Disaster Monitoring System",
@@ -39,6 +53,8 @@ def display_home_page(db):
     
     # Filters in a cleaner expander
     with st.expander("Filter Disaster Events", expanded=True):
+        search_text = st.text_input("Search", placeholder="Keywords or place names, e.g. flood Kerala")
+        
         col1, col2, col3 = st.columns(3)
         
         with col1:
@@ -64,23 +80,31 @@ def display_home_page(db):
         filters['disaster_type'] = selected_type
     
     # Get data from database
-    disaster_events = db.get_disaster_events(filters)
+    if search_text.strip():
+        # Ranked search results, one page at a time
+        page_number = st.number_input("Results Page", min_value=1, value=1, step=1)
+        disaster_events, has_more = db.search_events(search_text, filters, page=int(page_number), page_size=50)
+        
+        if has_more:
+            st.caption(f"Showing page {page_number} of the results. More results are on the next page.")
+        else:
+            st.caption(f"Showing page {page_number} of the results.")
+    else:
+        disaster_events = db.get_disaster_events(filters)
+    
+    # Home only displays publishedAt, so skip parsing it
+    events_df = build_event_frame(disaster_events, parse_dates=False)
     
     # Display statistics
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total Events", len(disaster_events))
     
     if disaster_events:
-        disaster_types_count = {}
-        for event in disaster_events:
-            disaster_type = event.get('disaster_type', 'unknown')
-            disaster_types_count[disaster_type] = disaster_types_count.get(disaster_type, 0) + 1
-        
-        most_common_type = max(disaster_types_count.items(), key=lambda x: x[1])[0]
+        most_common_type = events_df['disaster_type'].value_counts().idxmax()
         col2.metric("Most Common Disaster", most_common_type.capitalize())
         
         # Get locations count
-        location_count = sum(len(event.get('locations', [])) for event in disaster_events)
+        location_count = int(events_df['locations'].str.len().sum())
         col3.metric("Affected Locations", location_count)
         
         # Get most recent event
@@ -90,44 +114,61 @@ def display_home_page(db):
     # Create and display map
     st.subheader("Disaster Events Map")
     
+    map_mode = st.radio("Map Mode", ["Markers", "Heatmap", "Grid"], horizontal=True)
+    
     # Create map
     m = folium.Map(location=[20, 0], zoom_start=2)
     
-    # Add disaster events to map with ID for later reference
-    for i, event in enumerate(disaster_events):
-        for location in event.get('locations', []):
-            popup_html = f"""
-            <strong>{event['title']}</strong><br>
-            Type: {event['disaster_type']}<br>
-            Date: {event['publishedAt']}<br>
-            <a href="{event['url']}" target="_blank">Read more</a>
-            <button onclick="window.parent.postMessage({{'type': 'select_event', 'id': {i}}}, '*')">
-                Show Details
-            </button>
-            """
+    if map_mode == "Markers":
+        # Add disaster events to map with ID for later reference
+        for i, event in enumerate(disaster_events):
+            for location in event.get('locations', []):
+                popup_html = f"""
+                <strong>{event['title']}</strong><br>
+                Type: {event['disaster_type']}<br>
+                Date: {event['publishedAt']}<br>
+                <a href="{event['url']}" target="_blank">Read more</a>
+                <button onclick="window.parent.postMessage({{'type': 'select_event', 'id': {i}}}, '*')">
+                    Show Details
+                </button>
+                """
             
-            # Color based on disaster type
-            colors = {
-                'earthquake': 'red',
-                'flood': 'blue',
-                'hurricane': 'purple',
-                'tsunami': 'darkblue',
-                'wildfire': 'orange',
-                'tornado': 'darkpurple',
-                'cyclone': 'pink',
-                'landslide': 'darkred',
-                'volcano': 'darkred',
-                'drought': 'beige'
-            }
+                # Color based on disaster type
+                colors = {
+                    'earthquake': 'red',
+                    'flood': 'blue',
+                    'hurricane': 'purple',
+                    'tsunami': 'darkblue',
+                    'wildfire': 'orange',
+                    'tornado': 'darkpurple',
+                    'cyclone': 'pink',
+                    'landslide': 'darkred',
+                    'volcano': 'darkred',
+                    'drought': 'beige'
+                }
             
-            color = colors.get(event['disaster_type'], 'gray')
+                color = colors.get(event['disaster_type'], 'gray')
             
-            folium.Marker(
-                [location['latitude'], location['longitude']],
-                popup=folium.Popup(popup_html, max_width=300),
-                tooltip=f"{location['name']} - {event['disaster_type']}",
-                icon=folium.Icon(color=color)
-            ).add_to(m)
+                folium.Marker(
+                    [location['latitude'], location['longitude']],
+                    popup=folium.Popup(popup_html, max_width=300),
+                    tooltip=f"{location['name']} - {event['disaster_type']}",
+                    icon=folium.Icon(color=color)
+                ).add_to(m)
+    else:
+        # Aggregated modes read precomputed cell counts instead of every event
+        cell_sizes = {"Large": 2, "Medium": 3, "Small": 4}
+        cell_size = st.select_slider("Cell Size", options=list(cell_sizes), value="Medium")
+        if search_text.strip():
+            # The rollup knows nothing about the search, so aggregate the results page itself
+            cells = geohash.cell_counts(disaster_events, cell_sizes[cell_size])
+        else:
+            cells = db.get_cell_counts(filters, precision=cell_sizes[cell_size])
+        
+        if map_mode == "Heatmap":
+            add_cell_heatmap(m, cells)
+        else:
+            add_cell_grid(m, cells)
     
     # Display the map
     st_folium(m)
@@ -140,20 +181,15 @@ def display_home_page(db):
         st.subheader("Disaster Events Data")
         
         # Convert to dataframe for display
-        df_data = []
-        for i, event in enumerate(disaster_events):
-            locations_str = ", ".join([loc['name'] for loc in event.get('locations', [])])
-            df_data.append({
-                "ID": i,
-                "Title": event['title'],
-                "Disaster Type": event['disaster_type'],
-                "Locations": locations_str,
-                "Date": event['publishedAt'],
-                "Source": event['source']
+        if not events_df.empty:
+            df = pd.DataFrame({
+                "ID": events_df.index,
+                "Title": events_df['title'],
+                "Disaster Type": events_df['disaster_type'],
+                "Locations": join_location_names(events_df),
+                "Date": events_df['publishedAt'],
+                "Source": events_df['source']
             })
-        
-        if df_data:
-            df = pd.DataFrame(df_data)
             
             # Make the table interactive to select events
             selected_rows = st.dataframe(df, use_container_width=True, height=400)
@@ -200,8 +236,8 @@ def display_home_page(db):
     
     # Active disasters marquee
     st.sidebar.markdown("### Active Disasters (Last Week)")
-    recent_disasters = db.get_recent_disasters()
-    recent_titles = [f"{d['disaster_type'].upper()}: {d['title']}" for d in recent_disasters[:10]]
+    recent_disasters = db.get_latest_events(limit=10)
+    recent_titles = [f"{d['disaster_type'].upper()}: {d['title']}" for d in recent_disasters]
     
     if recent_titles:
         marquee_text = " | ".join(recent_titles)
@@ -233,20 +269,94 @@ def display_home_page(db):
         </style>
         """, unsafe_allow_html=True)
     
-    # Button to refresh data
+    # Refresh runs in the background so the page stays interactive
+    display_refresh_controls(get_ingest_job_manager())
+
+def add_cell_heatmap(m, cells):
+    if not cells:
+        return
+    
+    # Leaflet.heat clamps intensities at 1.0, so raw counts would all render at full strength
+    max_count = max(cell['count'] for cell in cells)
+    HeatMap([[cell['latitude'], cell['longitude'], cell['count'] / max_count] for cell in cells]).add_to(m)
+
+def add_cell_grid(m, cells):
+    if not cells:
+        return
+    
+    max_count = max(cell['count'] for cell in cells)
+    features = []
+    for cell in cells:
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": [geohash.polygon(cell['_id'])]},
+            "properties": {"count": cell['count'], "opacity": 0.2 + 0.6 * cell['count'] / max_count}
+        })
+    
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        style_function=lambda feature: {
+            "fillColor": "red",
+            "color": "darkred",
+            "weight": 0.5,
+            "fillOpacity": feature["properties"]["opacity"]
+        },
+        tooltip=folium.GeoJsonTooltip(fields=["count"], aliases=["Events"])
+    ).add_to(m)
+
+# st.fragment (or its experimental predecessor) reruns just the job status on a timer;
+# without either, the status refreshes on the next interaction
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+JOB_STATUS_POLL_SECONDS = 2
+
+def display_refresh_controls(job_manager):
     if st.sidebar.button("Refresh Data"):
-        with st.spinner("Fetching new disaster data..."):
-            collector = NewsDataCollector()
-            processor = DataProcessor()
-            
-            # Fetch and process new data
-            raw_articles = collector.fetch_disaster_news()
-            processed_articles = processor.process_articles(raw_articles)
-            
-            # Store in database
-            new_count = db.store_disaster_data(processed_articles)
-            st.success(f"Added {new_count} new disaster events to the database!")
-            st.experimental_rerun()
+        job, started = job_manager.start_job()
+        if not started:
+            st.sidebar.info("A data refresh is already running.")
+    
+    job = job_manager.get_latest_job()
+    if not job:
+        return
+    
+    with st.sidebar:
+        if fragment is None:
+            display_job_status(job_manager, job['_id'])
+        else:
+            # Poll only while a job is active; the job record is re-read on every run
+            polling = job['status'] in ('queued', 'running')
+            run_every = JOB_STATUS_POLL_SECONDS if polling else None
+            fragment(run_every=run_every)(display_job_status)(job_manager, job['_id'], polling)
+
+def display_job_status(job_manager, job_id, polling=False):
+    job = job_manager.get_job(job_id)
+    
+    if polling and job['status'] not in ('queued', 'running'):
+        # Rerun the whole page so it shows the new events and stops polling
+        st.rerun()
+    
+    if job['status'] in ('queued', 'running'):
+        st.markdown(f"**Refreshing data**: {job['stage']}")
+        progress = job['processed'] / job['fetched'] if job['fetched'] else 0.0
+        st.progress(min(progress, 1.0))
+        st.caption(
+            f"Fetched {job['fetched']} articles, processed {job['processed']}, "
+            f"added {job['stored']} new events"
+        )
+        
+        col1, col2 = st.columns(2)
+        if fragment is None:
+            # Any interaction reruns the script and re-reads the job record
+            col1.button("Update Status")
+        if col2.button("Cancel", disabled=job['cancel_requested']):
+            job_manager.cancel_job(job['_id'])
+            st.info("Cancelling after the current request or batch...")
+    elif job['status'] == 'completed':
+        st.success(f"Last refresh added {job['stored']} new disaster events.")
+    elif job['status'] == 'cancelled':
+        st.warning(f"Last refresh was cancelled after adding {job['stored']} events.")
+    elif job['status'] == 'failed':
+        st.error(f"Last refresh failed: {job['error']}")
 
 def display_alerts_page(db):
     st.title("Disaster Alerts")
@@ -314,36 +424,20 @@ def display_alerts_page(db):
 def display_insights_page(db):
     st.title("Disaster Insights")
     
-    # Get all disaster data
-    all_disasters = db.get_disaster_events()
+    # Stream only the fields used below straight into a DataFrame
+    df = build_event_frame(db.iter_disaster_events(projection=EVENT_PROJECTION))
+    missing_dates = df['published_date'].isna().sum()
+    if missing_dates:
+        print(f"Skipping {missing_dates} events without a valid publishedAt for insights")
+    df = df.dropna(subset=['published_date'])
     
-    if not all_disasters:
+    if df.empty:
         st.warning("No disaster data available for analysis.")
         return
     
-    # Convert to DataFrame for analysis
-    df_data = []
-    for event in all_disasters:
-        try:
-            published_date = datetime.fromisoformat(event['publishedAt'].replace('Z', '+00:00'))
-            locations = [loc['name'] for loc in event.get('locations', [])]
-            countries = list(set([loc['name'].split(', ')[-1] if ', ' in loc['name'] else loc['name'] for loc in event.get('locations', [])]))
-            
-            df_data.append({
-                "disaster_type": event['disaster_type'],
-                "published_date": published_date,
-                "month": published_date.month,
-                "year": published_date.year,
-                "source": event['source'],
-                "title": event['title'],
-                "locations": locations,
-                "countries": countries,
-                "location_count": len(locations)
-            })
-        except Exception as e:
-            print(f"Error processing event for insights: {str(e)}")
-    
-    df = pd.DataFrame(df_data)
+    # One row per (event, country), counting each country once per event
+    country_df = build_location_frame(df).dropna(subset=['country'])
+    country_df = country_df.drop_duplicates(['event_id', 'country'])
     
     # Set up tabs for different insights
     tab1, tab2, tab3 = st.tabs(["Disaster Distribution", "Temporal Analysis", "Geographic Analysis"])
@@ -390,7 +484,7 @@ def display_insights_page(db):
         
         # Monthly trend
         df['month_year'] = df['published_date'].dt.strftime('%Y-%m')
-        monthly_counts = df.groupby(['month_year', 'disaster_type']).size().unstack().fillna(0)
+        monthly_counts = df.groupby(['month_year', 'disaster_type'], observed=True).size().unstack().fillna(0)
         
         # Plot using Plotly
         fig = px.line(
@@ -426,12 +520,9 @@ def display_insights_page(db):
     with tab3:
         st.subheader("Geographic Analysis")
         
-        # Extract and count countries
-        all_countries = []
-        for countries_list in df['countries']:
-            all_countries.extend(countries_list)
-        
-        country_counts = pd.Series(all_countries).value_counts().head(15).reset_index()
+        # Count countries
+        country_counts = country_df['country'].value_counts()
+        country_counts = country_counts[country_counts > 0].head(15).reset_index()
         country_counts.columns = ['Country', 'Count']
         
         fig = px.bar(
@@ -449,19 +540,10 @@ def display_insights_page(db):
         # Disaster types by top countries
         top_countries = country_counts['Country'].head(5).tolist()
         
-        country_disaster_data = []
-        for _, row in df.iterrows():
-            for country in row['countries']:
-                if country in top_countries:
-                    country_disaster_data.append({
-                        'Country': country,
-                        'Disaster Type': row['disaster_type']
-                    })
-        
-        country_disaster_df = pd.DataFrame(country_disaster_data)
+        country_disaster_df = country_df[country_df['country'].isin(top_countries)]
         
         # Create grouped bar chart
-        country_disaster_counts = country_disaster_df.groupby(['Country', 'Disaster Type']).size().reset_index()
+        country_disaster_counts = country_disaster_df.groupby(['country', 'disaster_type'], observed=True).size().reset_index()
         country_disaster_counts.columns = ['Country', 'Disaster Type', 'Count']
         
         fig = px.bar(
@@ -639,12 +721,13 @@ def display_login_page(db):
             st.success("Registration successful! You can now login.")
 
 def main():
+    # Set up app and get current page; set_page_config must be the first Streamlit command
+    page = setup_app()
+    
     # Create instances
+    prepare_database()
     db = Database()
     
-    # Set up app and get current page
-    page = setup_app()
-    
     # Display current page
     if page == "Home":
         display_home_page(db)
@@ -6,6 +6,7 @@ Can be set up as a cron job or scheduled task.
 import os
 import sys
 import json
+import argparse
 from datetime import datetime
 
 # Add project directory to path if running as script
@@ -13,19 +14,25 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.news_api import NewsDataCollector
 from utils.data_processor import DataProcessor
+from utils.location_extractor import LocationExtractor
+from utils.geocoding import AsyncGeocoder, GeocodeStore
+from utils.raw_archive import RawArchive
+from utils.backfill import BackfillJob
 from models.database import Database
+from models.retention import RetentionManager
 
-def collect_and_process_data():
+def collect_and_process_data(combined=False):
     print(f"Starting data collection at {datetime.now().isoformat()}")
     
     # Initialize components
-    collector = NewsDataCollector()
+    collector = NewsDataCollector(archive=RawArchive())
     processor = DataProcessor()
     db = Database()
+    db.ensure_indexes()
     
     # Collect data
     print("Collecting news data...")
-    raw_articles = collector.fetch_disaster_news(days_back=2)  # Get last 2 days of news
+    raw_articles = collector.fetch_disaster_news(days_back=2, combined=combined)  # Get last 2 days of news
     
     # Process data
     print("Processing articles...")
@@ -40,5 +47,169 @@ def collect_and_process_data():
     
     return new_count
 
+def backfill_location_details():
+    """Add country/admin details to locations stored before they were geocoded at ingest"""
+    print(f"Starting location backfill at {datetime.now().isoformat()}")
+    
+    location_extractor = LocationExtractor()
+    db = Database()
+    db.ensure_indexes()
+    
+    location_names = db.get_unenriched_location_names()
+    print(f"Found {len(location_names)} location names to enrich")
+    
+    # Geocode all names in parallel within the provider rate limit
+    futures = location_extractor.request_coordinates(location_names)
+    
+    updated_count = 0
+    failed_count = 0
+    for location_name, future in futures.items():
+        try:
+            result = future.result()
+        except Exception as e:
+            # Transient failure (timeout, network, rate limit): retry on the next run
+            print(f"Error geocoding {location_name}: {str(e)}")
+            failed_count += 1
+            continue
+        
+        if not result:
+            # The provider answered "not found": record the miss so the name is not looked up again
+            result = {'country_code': None, 'country': None, 'admin1': None}
+        
+        details = {key: result.get(key) for key in ('country_code', 'country', 'admin1')}
+        updated_count += db.set_location_details(location_name, details)
+    
+    print(f"Completed location backfill. Updated {updated_count} events, "
+          f"{failed_count} names failed and will be retried on the next run.")
+    print(f"Finished at {datetime.now().isoformat()}")
+    
+    return updated_count
+
+def replay_archive(start_date=None, end_date=None, keywords=None, chunk_size=100):
+    """Reprocess archived raw responses through DataProcessor and Database without the network"""
+    print(f"Starting archive replay at {datetime.now().isoformat()}")
+    
+    archive = RawArchive()
+    db = Database()
+    db.ensure_indexes()
+    
+    # Geocode only from the persisted provider answers and the locations already
+    # stored; names found in neither are left out rather than sent to the provider
+    stored_locations = db.get_stored_locations()
+    geocoder = AsyncGeocoder(providers=[], store=GeocodeStore(),
+                             cache_size=len(stored_locations) + 10000)
+    geocoder.seed(stored_locations)
+    print(f"Seeded geocoder with {len(stored_locations)} stored locations")
+    processor = DataProcessor(geocoder=geocoder)
+    
+    replayed_count = 0
+    new_count = 0
+    chunk = []
+    for article in archive.iter_articles(start_date, end_date, keywords):
+        chunk.append(article)
+        if len(chunk) >= chunk_size:
+            new_count += db.store_disaster_data(processor.process_articles(chunk))
+            replayed_count += len(chunk)
+            print(f"Replayed {replayed_count} articles, added {new_count} new events")
+            chunk = []
+    
+    if chunk:
+        new_count += db.store_disaster_data(processor.process_articles(chunk))
+        replayed_count += len(chunk)
+    
+    print(f"Completed archive replay of {replayed_count} articles. Added {new_count} new disaster events.")
+    print(f"Finished at {datetime.now().isoformat()}")
+    
+    return new_count
+
+def run_backfill(batch_size=200, max_rate=100, restart=False):
+    """Re-run location extraction over stored events, resuming from the last checkpoint"""
+    print(f"Starting backfill at {datetime.now().isoformat()}")
+    
+    db = Database()
+    db.ensure_indexes()
+    
+    job = BackfillJob(db, batch_size=batch_size, max_docs_per_second=max_rate)
+    checkpoint = job.run(restart=restart)
+    
+    # Changed locations move events between map cells
+    if checkpoint['updated']:
+        print("Rebuilding map cell rollup...")
+        db.rebuild_cell_rollup()
+    
+    print(f"Finished at {datetime.now().isoformat()}")
+    return checkpoint['updated']
+
+def apply_retention(archive_ttl_days=None):
+    """Compact hot events and move events past the hot window into the archive"""
+    print(f"Starting retention at {datetime.now().isoformat()}")
+    
+    db = Database()
+    db.ensure_indexes()
+    
+    compacted_count, moved_count = RetentionManager(db, archive_ttl_days=archive_ttl_days).run()
+    
+    # The TTL monitor deletes archived events without touching the map cell
+    # rollup, so recount to drop the events it has expired since the last run
+    if archive_ttl_days:
+        print("Rebuilding map cell rollup...")
+        db.rebuild_cell_rollup()
+    
+    print(f"Completed retention. Compacted {compacted_count} hot events, archived {moved_count} events.")
+    print(f"Finished at {datetime.now().isoformat()}")
+    
+    return moved_count
+
+def rebuild_cells():
+    """Recompute the map cell rollup from all stored events"""
+    print(f"Starting cell rollup rebuild at {datetime.now().isoformat()}")
+    
+    db = Database()
+    db.ensure_indexes()
+    event_count = db.rebuild_cell_rollup()
+    
+    print(f"Rebuilt cell rollup from {event_count} events.")
+    print(f"Finished at {datetime.now().isoformat()}")
+    
+    return event_count
+
 if __name__ == "__main__":
-    collect_and_process_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Collect and process disaster news data")
+    parser.add_argument("--backfill-locations", action="store_true",
+                        help="enrich stored locations with country/admin details instead of collecting")
+    parser.add_argument("--combined", action="store_true",
+                        help="fetch with combined OR queries and classify disaster types locally")
+    parser.add_argument("--backfill", action="store_true",
+                        help="re-run location extraction over stored events (resumable)")
+    parser.add_argument("--batch-size", type=int, default=200,
+                        help="events per backfill batch")
+    parser.add_argument("--max-rate", type=float, default=100,
+                        help="maximum backfill throughput in events per second (0 for unlimited)")
+    parser.add_argument("--restart", action="store_true",
+                        help="discard the backfill checkpoint and start from the beginning")
+    parser.add_argument("--retention", action="store_true",
+                        help="compact hot events and archive events older than HOT_RETENTION_DAYS")
+    parser.add_argument("--archive-ttl-days", type=int,
+                        help="delete archived events this many days after archiving")
+    parser.add_argument("--rebuild-cells", action="store_true",
+                        help="recompute the map cell rollup from all stored events")
+    parser.add_argument("--replay", action="store_true",
+                        help="reprocess archived raw responses instead of calling the API")
+    parser.add_argument("--from-date", help="first archive date to replay (YYYY-MM-DD)")
+    parser.add_argument("--to-date", help="last archive date to replay (YYYY-MM-DD)")
+    parser.add_argument("--keyword", action="append", dest="keywords",
+                        help="only replay archives for this keyword (repeatable)")
+    args = parser.parse_args()
+    
+    if args.backfill_locations:
+        backfill_location_details()
+    elif args.backfill:
+        run_backfill(args.batch_size, args.max_rate, args.restart)
+    elif args.retention:
+        apply_retention(args.archive_ttl_days)
+    elif args.rebuild_cells:
+        rebuild_cells()
+    elif args.replay:
+        replay_archive(args.from_date, args.to_date, args.keywords)
+    else:
+        collect_and_process_data(combined=args.combined)
\ No newline at end of file
@@ -0,0 +1,251 @@
+"""
+Load test for the Streamlit dashboard. Simulates concurrent sessions navigating
+Home/Insights/Alerts with varied filters and reports rerun latency percentiles,
+CPU use and memory per session.
+
+AppTest swaps the process-wide Streamlit runtime in and out around every run, so
+each session runs in its own process and the results are merged afterwards.
+A session therefore also pays for its own imports and resource caches, which a
+real server shares between sessions: treat the per-session CPU and memory as an
+upper bound.
+
+Point MONGODB_URI at a local MongoDB before running; --seed fills it with
+synthetic events.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import multiprocessing
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from streamlit.testing.v1 import AppTest
+
+# Add project directory to path if running as script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import Database
+from utils.geohash import encode as geohash_encode
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+PAGES = ["Home", "Insights", "Alerts"]
+DISASTER_TYPES = ["All", "earthquake", "flood", "hurricane", "tsunami", "wildfire",
+                  "tornado", "cyclone", "landslide", "volcano", "drought"]
+MAP_MODES = ["Markers", "Heatmap", "Grid"]
+PLACES = [
+    ("Tokyo", "Japan", 35.68, 139.69), ("Manila", "Philippines", 14.60, 120.98),
+    ("Santiago", "Chile", -33.45, -70.67), ("Los Angeles", "United States", 34.05, -118.24),
+    ("Jakarta", "Indonesia", -6.21, 106.85), ("Kerala", "India", 10.85, 76.27),
+    ("Izmir", "Turkey", 38.42, 27.14), ("Queensland", "Australia", -20.92, 142.70)
+]
+
+def seed_database(event_count, days=60):
+    """Insert synthetic events into a local MongoDB"""
+    host = urlparse(os.getenv('MONGODB_URI') or 'mongodb://localhost').hostname
+    if host not in ('localhost', '127.0.0.1', None):
+        raise SystemExit(f"Refusing to seed non-local MongoDB host {host}")
+
+    db = Database()
+    db.ensure_indexes()
+
+    events = []
+    now = datetime.now()
+    for i in range(event_count):
+        name, country, latitude, longitude = PLACES[i % len(PLACES)]
+        disaster_type = DISASTER_TYPES[1 + i % (len(DISASTER_TYPES) - 1)]
+        events.append({
+            "title": f"Load test {disaster_type} report {i} near {name}",
+            "description": f"Synthetic {disaster_type} event in {name}, {country}",
+            "url": f"https://example.com/load-test/{i}",
+            "urlToImage": None,
+            "publishedAt": (now - timedelta(minutes=random.randint(0, days * 24 * 60))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "source": f"Source {i % 40}",
+            "disaster_type": disaster_type,
+            "disaster_types": [disaster_type],
+            "locations": [{
+                "name": name, "latitude": latitude, "longitude": longitude, "country": country,
+                "geohash": geohash_encode(latitude, longitude)
+            }]
+        })
+
+    new_count = db.store_disaster_data(events)
+    print(f"Seeded {new_count} events")
+
+def _find_widget(widgets, label):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    return None
+
+def _rss_mb():
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss / 1024 ** 2
+
+def run_session(session_id, steps, timeout, start_barrier=None):
+    """Drive one simulated user through the dashboard in this process, timing each rerun"""
+    rng = random.Random(session_id)
+    app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    timings = []
+    errors = []
+
+    def timed_run(page):
+        started = time.perf_counter()
+        try:
+            app.run()
+        except Exception as e:
+            # A rerun timeout raises rather than setting app.exception
+            errors.append(f"{page}: {type(e).__name__}: {str(e)}")
+        else:
+            if app.exception:
+                errors.append(f"{page}: {app.exception[0].message}")
+        timings.append((page, time.perf_counter() - started))
+
+    def set_widget(widgets, label, value):
+        widget = _find_widget(widgets, label)
+        if widget is None:
+            return False
+        widget.set_value(value)
+        return True
+
+    # Start all sessions together once every process has imported Streamlit
+    if start_barrier is not None:
+        start_barrier.wait()
+
+    rss_before = _rss_mb()
+    cpu_before = time.process_time()
+    started_at = time.time()
+
+    timed_run("Home")
+    for _ in range(steps):
+        page = rng.choice(PAGES)
+        if not set_widget(app.sidebar.radio, "Navigation", page):
+            # The previous rerun failed before drawing the sidebar; start over
+            timed_run("Home")
+            continue
+        timed_run(page)
+
+        if page == "Home":
+            # Vary the filters the way a user would after landing on the page
+            if set_widget(app.selectbox, "Disaster Type", rng.choice(DISASTER_TYPES)):
+                timed_run(page)
+            if set_widget(app.radio, "Map Mode", rng.choice(MAP_MODES)):
+                timed_run(page)
+
+    rss_after = _rss_mb()
+    return {
+        'timings': timings,
+        'errors': errors,
+        'cpu': time.process_time() - cpu_before,
+        'started_at': started_at,
+        'finished_at': time.time(),
+        'rss': rss_after,
+        'rss_growth': rss_after - rss_before if rss_before is not None else None
+    }
+
+def _percentile(values, percent):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+def run_load_test(sessions, steps, timeout):
+    print(f"Running {sessions} concurrent sessions, {steps} navigation steps each")
+
+    # Spawn rather than fork so no session inherits the parent's MongoClient
+    context = multiprocessing.get_context('spawn')
+    results = []
+    failed_sessions = 0
+    with context.Manager() as manager:
+        start_barrier = manager.Barrier(sessions)
+        with ProcessPoolExecutor(max_workers=sessions, mp_context=context) as executor:
+            futures = [executor.submit(run_session, i, steps, timeout, start_barrier)
+                       for i in range(sessions)]
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"Session failed: {str(e)}")
+                    failed_sessions += 1
+
+    if not results:
+        print("No session completed")
+        return
+
+    wall = max(r['finished_at'] for r in results) - min(r['started_at'] for r in results)
+
+    by_page = {}
+    errors = []
+    for result in results:
+        errors.extend(result['errors'])
+        for page, latency in result['timings']:
+            by_page.setdefault(page, []).append(latency)
+
+    all_latencies = [latency for latencies in by_page.values() for latency in latencies]
+    print(f"\n{'Page':<10} {'Reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for page, latencies in sorted(by_page.items()) + [("All", all_latencies)]:
+        print(f"{page:<10} {len(latencies):>7} {_percentile(latencies, 50) * 1000:>8.0f} "
+              f"{_percentile(latencies, 95) * 1000:>8.0f} {_percentile(latencies, 99) * 1000:>8.0f} "
+              f"{max(latencies) * 1000:>8.0f}")
+
+    cpu = [result['cpu'] for result in results]
+    print(f"\nWall time: {wall:.1f}s, throughput {len(all_latencies) / wall:.1f} reruns/s")
+    print(f"CPU per session: mean {statistics.mean(cpu):.1f}s, max {max(cpu):.1f}s "
+          f"({sum(cpu) / wall * 100:.0f}% of one core in total)")
+    if results[0]['rss'] is not None:
+        rss = [result['rss'] for result in results]
+        growth = [result['rss_growth'] for result in results]
+        print(f"Memory per session: mean {statistics.mean(rss):.0f} MB RSS, max {max(rss):.0f} MB; "
+              f"mean {statistics.mean(growth):.1f} MB growth while running")
+    else:
+        print("Memory: install psutil to report RSS per session")
+    print(f"Errors: {len(errors)} reruns failed, {failed_sessions} sessions crashed")
+    for error in errors[:10]:
+        print(f"  {error}")
+
+def benchmark_search(repeats=5):
+    """Time Database.search_events ($text on a real server) for a few representative queries"""
+    db = Database()
+    queries = [("japan", None), ("synthetic flood report", None), ("kerala landslide", None),
+               ("chile", {'disaster_type': 'flood'}),
+               ("tokyo", {'from_date': (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%dT%H:%M:%SZ')})]
+
+    print(f"\nSearch over {db.disaster_collection.estimated_document_count()} hot and "
+          f"{db.archive_collection.estimated_document_count()} archived events")
+    for text, filters in queries:
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            db.search_events(text, filters, page_size=20)
+            timings.append(time.perf_counter() - started)
+        label = text + (f" {filters}" if filters else "")
+        print(f"Search {label!r}: p50 {statistics.median(timings) * 1000:.1f} ms, "
+              f"max {max(timings) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the dashboard")
+    parser.add_argument("--sessions", type=int, default=10, help="number of concurrent sessions")
+    parser.add_argument("--steps", type=int, default=20, help="page navigations per session")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per rerun")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="insert this many synthetic events into the local MongoDB first")
+    parser.add_argument("--search", action="store_true",
+                        help="benchmark search_events instead of running sessions")
+    args = parser.parse_args()
+
+    if args.seed:
+        seed_database(args.seed)
+
+    if args.search:
+        benchmark_search()
+    else:
+        run_load_test(args.sessions, args.steps, args.timeout)
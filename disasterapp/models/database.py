@@ -1,39 +1,278 @@
 import os
+import threading
+from bson import ObjectId
 from dotenv import load_dotenv
-from pymongo import MongoClient
-from datetime import datetime,timedelta 
+from pymongo import MongoClient, UpdateOne, TEXT
+from pymongo.errors import CollectionInvalid, OperationFailure
+from itertools import chain
+from datetime import datetime,timedelta,timezone 
+from utils.geohash import encode as geohash_encode, center as geohash_center, ROLLUP_PRECISIONS
+from utils.search_index import BM25Index
+
+try:
+    import mongomock
+except ImportError:  # only used to recognise the offline mock client
+    mongomock = None
 
 load_dotenv()
 
+# Events newer than this stay in the hot collection; older ones are moved to the archive
+HOT_RETENTION_DAYS = int(os.getenv('HOT_RETENTION_DAYS', 90))
+
+# Fields dropped from hot documents; the raw archive keeps the full article
+HOT_EXCLUDED_FIELDS = ('content',)
+
+# Local search index shared by all Database instances of this process, built in
+# the background at startup when the server has no text index (e.g. mongomock or
+# offline copies) and then kept current by scanning only events newer than the
+# last sync. It is meant for small/offline data sets: production servers always
+# get the $text index from ensure_indexes
+_local_search_index = None
+_local_search_synced_at = None
+_local_search_lock = threading.Lock()
+
+# ObjectIds from other processes are only ordered to the second (and by their
+# clocks), so each sync rescans this much before the last sync time
+LOCAL_SEARCH_SYNC_OVERLAP = timedelta(seconds=60)
+
+# Size of the capped collection holding compact headline records for the ticker
+LATEST_FEED_MAX_EVENTS = 5000
+LATEST_FEED_FIELDS = ('title', 'disaster_type', 'publishedAt', 'url', 'source')
+LATEST_FEED_DAYS = 30
+
 class Database:
     def __init__(self):
         self.mongo_uri = os.getenv('MONGODB_URI')
         self.client = MongoClient(self.mongo_uri)
         self.db = self.client.disaster_monitoring
         self.disaster_collection = self.db.disaster_events
+        self.archive_collection = self.db.disaster_events_archive
+        self.cell_rollup_collection = self.db.disaster_cells
+        self.latest_feed_collection = self.db.latest_events
         self.users_collection = self.db.users
+        self.ingest_jobs_collection = self.db.ingest_jobs
+        self.backfill_checkpoints_collection = self.db.backfill_checkpoints
+        
+    def ensure_indexes(self):
+        """Create the indexes used by the dashboard queries"""
+        self.disaster_collection.create_index('url')
+        self.disaster_collection.create_index([('disaster_type', 1), ('publishedAt', -1)])
+        self.disaster_collection.create_index('publishedAt')
+        self.disaster_collection.create_index('locations.country_code')
+        self.disaster_collection.create_index('locations.country')
+        self.archive_collection.create_index('url')
+        self.archive_collection.create_index([('disaster_type', 1), ('publishedAt', -1)])
+        self.archive_collection.create_index('publishedAt')
+        self.cell_rollup_collection.create_index([('precision', 1), ('day', 1), ('disaster_type', 1)])
+        self.disaster_collection.create_index(
+            [('title', TEXT), ('description', TEXT), ('locations.name', TEXT)],
+            weights={'title': 5, 'locations.name': 3, 'description': 1},
+            name='event_text'
+        )
+        self.archive_collection.create_index(
+            [('title', TEXT), ('locations.name', TEXT)],
+            weights={'title': 5, 'locations.name': 3},
+            name='event_text'
+        )
+        
+        self._ensure_latest_feed()
+        
+    def _ensure_latest_feed(self):
+        """Create the capped latest-events collection and seed it from stored events"""
+        if 'latest_events' not in self.db.list_collection_names():
+            try:
+                self._create_latest_feed()
+            except CollectionInvalid:
+                # Another process starting at the same time created it first
+                pass
         
+        self.latest_feed_collection.create_index([('publishedAt', -1)])
+        self.latest_feed_collection.create_index([('disaster_type', 1), ('publishedAt', -1)])
+        
+        if self.latest_feed_collection.estimated_document_count() == 0:
+            recent = self.disaster_collection.find({}, {field: 1 for field in LATEST_FEED_FIELDS}) \
+                .sort('publishedAt', -1).limit(LATEST_FEED_MAX_EVENTS)
+            # Insert oldest first so the cap evicts the oldest headlines
+            self._add_to_latest_feed(reversed(list(recent)))
+    
+    def _create_latest_feed(self):
+        try:
+            self.db.create_collection(
+                'latest_events',
+                capped=True,
+                size=LATEST_FEED_MAX_EVENTS * 1024,
+                max=LATEST_FEED_MAX_EVENTS
+            )
+        except NotImplementedError:
+            # mongomock has no capped collections; get_latest_events sorts and limits anyway
+            self.db.create_collection('latest_events')
+    
+    def _add_to_latest_feed(self, events):
+        # Old articles (e.g. from an archive replay) must not evict current headlines
+        cutoff = (datetime.now() - timedelta(days=LATEST_FEED_DAYS)).isoformat()
+        records = [{'event_id': event['_id'], **{field: event.get(field) for field in LATEST_FEED_FIELDS}}
+                   for event in events if (event.get('publishedAt') or '') >= cutoff]
+        if records:
+            self.latest_feed_collection.insert_many(records)
+    
+    def hot_cutoff(self):
+        """publishedAt value before which events live in the archive collection"""
+        return (datetime.now() - timedelta(days=HOT_RETENTION_DAYS)).isoformat()
+    
     def store_disaster_data(self, processed_articles):
         """Store processed disaster articles in MongoDB"""
         count = 0
+        inserted_articles = []
         for article in processed_articles:
             # Create a unique identifier to avoid duplicates
             article_url = article.get('url')
             
-            # Check if article already exists
+            # Check if article already exists, in the archive too for old articles
             existing = self.disaster_collection.find_one({'url': article_url})
+            if not existing and (article.get('publishedAt') or '') < self.hot_cutoff():
+                existing = self.archive_collection.find_one({'url': article_url})
             if not existing:
                 # Add timestamp for when it was added to database
                 article['added_to_db'] = datetime.now().isoformat()
                 
+                # Keep hot documents compact
+                for field in HOT_EXCLUDED_FIELDS:
+                    article.pop(field, None)
+                
                 # Insert the document
                 self.disaster_collection.insert_one(article)
+                inserted_articles.append(article)
+                
+                with _local_search_lock:
+                    if _local_search_index is not None:
+                        _local_search_index.add(article['_id'], article)
                 count += 1
         
+        self._update_cell_rollup(inserted_articles)
+        self._add_to_latest_feed(sorted(inserted_articles, key=lambda event: event.get('publishedAt') or ''))
         return count
     
-    def get_disaster_events(self, filters=None):
-        """Retrieve disaster events with optional filters"""
+    def _update_cell_rollup(self, events, rollup_collection=None):
+        """Add events to the per-cell, per-day, per-type counts used by the aggregated map"""
+        counts = {}
+        for event in events:
+            day = (event.get('publishedAt') or '')[:10]
+            
+            # An event counts once per cell even if several of its locations fall in it
+            cells = set()
+            for loc in event.get('locations', []):
+                if loc.get('latitude') is None or loc.get('longitude') is None:
+                    continue
+                cell = loc.get('geohash') or geohash_encode(loc['latitude'], loc['longitude'])
+                cells.update(cell[:precision] for precision in ROLLUP_PRECISIONS)
+            
+            for cell in cells:
+                key = (cell, day, event.get('disaster_type'))
+                counts[key] = counts.get(key, 0) + 1
+        
+        operations = []
+        for (cell, day, disaster_type), count in counts.items():
+            latitude, longitude = geohash_center(cell)
+            operations.append(UpdateOne(
+                {'_id': f"{cell}:{day}:{disaster_type}"},
+                {'$inc': {'count': count},
+                 '$setOnInsert': {'cell': cell, 'precision': len(cell), 'day': day,
+                                  'disaster_type': disaster_type,
+                                  'latitude': latitude, 'longitude': longitude}},
+                upsert=True
+            ))
+        
+        if rollup_collection is None:
+            rollup_collection = self.cell_rollup_collection
+        if operations:
+            rollup_collection.bulk_write(operations, ordered=False)
+    
+    def rebuild_cell_rollup(self, batch_size=5000):
+        """Recompute the cell rollup from all stored events, e.g. after a backfill
+        
+        The new rollup is built in a separate collection and swapped in with a
+        rename, so the map keeps reading the old counts until it is complete.
+        
+        Known gaps:
+        - An event stored between the last catch-up pass and the rename is
+          counted into the old collection, which the rename drops, so it is
+          missing until the next rebuild. There is no cross-process write
+          lock to close this window, which lasts only as long as the rename.
+        - Events deleted by the archive TTL are not subtracted as they expire.
+          apply_retention rebuilds the rollup when a TTL is set, so counts
+          catch up on each retention run.
+        """
+        rebuild_collection = self.db.disaster_cells_rebuild
+        rebuild_collection.drop()
+        rebuild_collection.create_index([('precision', 1), ('day', 1), ('disaster_type', 1)])
+        
+        # Events inserted from now on are picked up by the catch-up passes below
+        bound = ObjectId.from_datetime(datetime.now(timezone.utc))
+        projection = {'publishedAt': 1, 'disaster_type': 1, 'locations.latitude': 1,
+                      'locations.longitude': 1, 'locations.geohash': 1}
+        
+        def add_events(cursor):
+            count = 0
+            batch = []
+            for event in cursor:
+                batch.append(event)
+                if len(batch) >= batch_size:
+                    self._update_cell_rollup(batch, rebuild_collection)
+                    count += len(batch)
+                    batch = []
+            self._update_cell_rollup(batch, rebuild_collection)
+            return count + len(batch)
+        
+        # Archive first: an event moved by retention during the scan is then
+        # missed rather than counted twice
+        event_count = 0
+        for collection in (self.archive_collection, self.disaster_collection):
+            cursor = collection.find({'_id': {'$lt': bound}}, projection).batch_size(batch_size)
+            event_count += add_events(cursor)
+        
+        # Catch up on events inserted during the scan until none are left; ids are
+        # remembered because ObjectIds from other processes can arrive out of order
+        caught_up_ids = set()
+        while True:
+            new_events = [event for event in self.disaster_collection.find({'_id': {'$gte': bound}}, projection)
+                          if event['_id'] not in caught_up_ids]
+            if not new_events:
+                break
+            caught_up_ids.update(event['_id'] for event in new_events)
+            event_count += add_events(new_events)
+        
+        rebuild_collection.rename(self.cell_rollup_collection.name, dropTarget=True)
+        return event_count
+    
+    def get_cell_counts(self, filters=None, precision=3):
+        """Event counts per grid cell at a precision, for the date range and type in filters"""
+        match = {'precision': precision}
+        
+        if filters:
+            if filters.get('disaster_type'):
+                match['disaster_type'] = filters['disaster_type']
+            
+            day_range = {}
+            if filters.get('from_date'):
+                day_range['$gte'] = filters['from_date'][:10]
+            if filters.get('to_date'):
+                day_range['$lte'] = filters['to_date'][:10]
+            if day_range:
+                match['day'] = day_range
+        
+        pipeline = [
+            {'$match': match},
+            {'$group': {
+                '_id': '$cell',
+                'count': {'$sum': '$count'},
+                'latitude': {'$first': '$latitude'},
+                'longitude': {'$first': '$longitude'}
+            }}
+        ]
+        return list(self.cell_rollup_collection.aggregate(pipeline))
+    
+    def _build_event_query(self, filters=None):
+        """Translate page filters into a MongoDB query"""
         query = {}
         
         if filters:
@@ -49,13 +288,173 @@ class Database:
                 else:
                     query['publishedAt'] = {'$lte': filters['to_date']}
         
-        return list(self.disaster_collection.find(query))
+        return query
+    
+    def _spans_archive(self, filters=None):
+        """Whether a date range reaches back past the hot retention window"""
+        from_date = filters.get('from_date') if filters else None
+        return not from_date or from_date < self.hot_cutoff()
+    
+    def get_disaster_events(self, filters=None):
+        """Retrieve disaster events with optional filters"""
+        return list(self.iter_disaster_events(filters))
+    
+    def iter_disaster_events(self, filters=None, projection=None, batch_size=1000):
+        """Stream disaster events in batches, reading the archive when the range needs it"""
+        query = self._build_event_query(filters)
+        cursor = self.disaster_collection.find(query, projection).batch_size(batch_size)
+        
+        if not self._spans_archive(filters):
+            return cursor
+        
+        archive_cursor = self.archive_collection.find(query, projection).batch_size(batch_size)
+        return chain(cursor, archive_cursor)
+    
+    def search_events(self, text, filters=None, page=1, page_size=20):
+        """Events matching a text query ranked by relevance; returns (events, has_more)"""
+        skip = (page - 1) * page_size
+        try:
+            ranked = self._text_search(text, filters, skip + page_size + 1)
+            return ranked[skip:skip + page_size], len(ranked) > skip + page_size
+        except (OperationFailure, NotImplementedError, TypeError) as e:
+            if not self._text_search_unavailable(e):
+                raise
+            ranked_ids = self._local_search(text, filters, skip + page_size + 1)
+            return self._fetch_events(ranked_ids[skip:skip + page_size]), len(ranked_ids) > skip + page_size
+    
+    def _text_search_unavailable(self, error):
+        """Whether a $text query failed because the server cannot run it, rather than a bug"""
+        if isinstance(error, OperationFailure):
+            # IndexNotFound: a copy of the data without the text index
+            return error.code == 27
+        # mongomock raises NotImplementedError for $text or TypeError when sorting on the textScore $meta
+        return mongomock is not None and isinstance(self.client, mongomock.MongoClient)
+    
+    def warm_local_search_index(self):
+        """Build the local search index in a background thread when the server cannot run $text,
+        so the first search does not pay for it; returns whether a build was started"""
+        try:
+            self._text_search('warmup', None, 1)
+            return False
+        except (OperationFailure, NotImplementedError, TypeError) as e:
+            if not self._text_search_unavailable(e):
+                raise
+        
+        def build():
+            with _local_search_lock:
+                self._sync_local_search_index()
+                _local_search_index.prepare()
+                print(f"Built local search index of {len(_local_search_index)} events")
+        
+        threading.Thread(target=build, daemon=True).start()
+        return True
+    
+    def _text_search(self, text, filters, limit):
+        """Top results from the MongoDB text indexes of both tiers, merged by score"""
+        query = self._build_event_query(filters)
+        query['$text'] = {'$search': text}
+        score = {'score': {'$meta': 'textScore'}}
+        
+        collections = [self.disaster_collection]
+        if self._spans_archive(filters):
+            collections.append(self.archive_collection)
+        
+        results = []
+        for collection in collections:
+            results.extend(collection.find(query, score).sort([('score', {'$meta': 'textScore'})]).limit(limit))
+        
+        results.sort(key=lambda event: event['score'], reverse=True)
+        return results[:limit]
+    
+    def _sync_local_search_index(self):
+        """Add events inserted since the last sync, by this or any other process"""
+        global _local_search_index, _local_search_synced_at
+        
+        synced_at = datetime.now(timezone.utc)
+        query = {}
+        if _local_search_synced_at is not None:
+            # Indexed on _id, so this reads only the recent tail of each tier;
+            # already-indexed events in the overlap are skipped by BM25Index.add
+            query = {'_id': {'$gte': ObjectId.from_datetime(_local_search_synced_at - LOCAL_SEARCH_SYNC_OVERLAP)}}
+        
+        if _local_search_index is None:
+            _local_search_index = BM25Index()
+        
+        projection = {'title': 1, 'description': 1, 'locations.name': 1,
+                      'disaster_type': 1, 'publishedAt': 1}
+        for collection in (self.disaster_collection, self.archive_collection):
+            for event in collection.find(query, projection):
+                _local_search_index.add(event['_id'], event)
+        
+        _local_search_synced_at = synced_at
+    
+    def _local_search(self, text, filters, limit):
+        """Ids of matching events ranked by the in-process BM25 index"""
+        filters = filters or {}
+        
+        def matches(disaster_type, published_at):
+            if filters.get('disaster_type') and disaster_type != filters['disaster_type']:
+                return False
+            if filters.get('from_date') and published_at < filters['from_date']:
+                return False
+            if filters.get('to_date') and published_at > filters['to_date']:
+                return False
+            return True
+        
+        with _local_search_lock:
+            self._sync_local_search_index()
+            return _local_search_index.search(text, matches, limit)
+    
+    def _fetch_events(self, ids):
+        """Fetch events by id from whichever tier holds them, keeping the order of ids"""
+        events = {event['_id']: event for event in self.disaster_collection.find({'_id': {'$in': ids}})}
+        missing = [doc_id for doc_id in ids if doc_id not in events]
+        if missing:
+            events.update((event['_id'], event) for event in self.archive_collection.find({'_id': {'$in': missing}}))
+        
+        return [events[doc_id] for doc_id in ids if doc_id in events]
     
     def get_recent_disasters(self, days=7):
         """Get disasters from the past days"""
         from_date = (datetime.now() - timedelta(days=days)).isoformat()
         return self.get_disaster_events({'from_date': from_date})
     
+    def get_latest_events(self, limit=10, days=7, disaster_type=None):
+        """Newest headline records from the capped feed, optionally for a single disaster type"""
+        query = {'publishedAt': {'$gte': (datetime.now() - timedelta(days=days)).isoformat()}}
+        if disaster_type:
+            query['disaster_type'] = disaster_type
+        
+        return list(self.latest_feed_collection.find(query, {'_id': 0}).sort('publishedAt', -1).limit(limit))
+    
+    def get_unenriched_location_names(self):
+        """Location names of stored events that have no country details yet"""
+        query = {'locations': {'$elemMatch': {'country_code': {'$exists': False}}}}
+        return self.disaster_collection.distinct('locations.name', query)
+    
+    def get_stored_locations(self):
+        """One geocoded location record per name across both tiers"""
+        pipeline = [
+            {'$unwind': '$locations'},
+            {'$match': {'locations.latitude': {'$ne': None}}},
+            {'$group': {'_id': '$locations.name', 'location': {'$first': '$locations'}}}
+        ]
+        locations = {}
+        for collection in (self.archive_collection, self.disaster_collection):
+            for group in collection.aggregate(pipeline):
+                locations[group['_id']] = group['location']
+        return list(locations.values())
+    
+    def set_location_details(self, location_name, details):
+        """Set country/admin details on every stored location with the given name"""
+        update = {f'locations.$[loc].{key}': value for key, value in details.items()}
+        result = self.disaster_collection.update_many(
+            {'locations.name': location_name},
+            {'$set': update},
+            array_filters=[{'loc.name': location_name, 'loc.country_code': {'$exists': False}}]
+        )
+        return result.modified_count
+    
     def register_user(self, username, email, password_hash, preferences=None):
         """Register a new user"""
         user = {
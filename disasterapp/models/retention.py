@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from pymongo.errors import BulkWriteError
+
+from .database import HOT_EXCLUDED_FIELDS
+
+# Archived events keep only what the map, tables and insights read
+ARCHIVE_EXCLUDED_FIELDS = HOT_EXCLUDED_FIELDS + ('description', 'urlToImage')
+
+class RetentionManager:
+    """Moves events older than the hot window into the compact archive collection"""
+
+    def __init__(self, db, batch_size=1000, archive_ttl_days=None):
+        self.db = db
+        self.batch_size = batch_size
+        self.archive_ttl_days = archive_ttl_days
+
+    def ensure_indexes(self):
+        """Create, update or drop the archive TTL index to match archive_ttl_days"""
+        collection = self.db.archive_collection
+        ttl_index, ttl_seconds = next(((name, info.get('expireAfterSeconds'))
+                                       for name, info in collection.index_information().items()
+                                       if info['key'] == [('archived_at', 1)]), (None, None))
+
+        if not self.archive_ttl_days:
+            # Without a TTL archived events are kept, so an index left by an earlier run must go
+            if ttl_seconds is not None:
+                collection.drop_index(ttl_index)
+                print("Dropped archive TTL index; archived events are no longer expired")
+            return
+
+        # Archived events expire for good once they pass the archive TTL
+        expire_after = int(timedelta(days=self.archive_ttl_days).total_seconds())
+        if ttl_index is None:
+            collection.create_index('archived_at', expireAfterSeconds=expire_after)
+        elif ttl_seconds != expire_after:
+            # create_index refuses to change the options of an existing index; collMod updates it in place
+            self.db.db.command('collMod', collection.name,
+                               index={'keyPattern': {'archived_at': 1}, 'expireAfterSeconds': expire_after})
+            print(f"Updated archive TTL from {ttl_seconds}s to {expire_after}s")
+
+    def compact_hot_events(self):
+        """Drop fields no longer kept on hot documents from events stored before compaction"""
+        query = {'$or': [{field: {'$exists': True}} for field in HOT_EXCLUDED_FIELDS]}
+        update = {'$unset': {field: '' for field in HOT_EXCLUDED_FIELDS}}
+        return self.db.disaster_collection.update_many(query, update).modified_count
+
+    def archive_old_events(self):
+        """Move events published before the hot cutoff to the archive, one batch at a time"""
+        cutoff = self.db.hot_cutoff()
+        projection = {field: 0 for field in ARCHIVE_EXCLUDED_FIELDS}
+        moved_count = 0
+
+        while True:
+            events = list(self.db.disaster_collection.find({'publishedAt': {'$lt': cutoff}}, projection)
+                          .limit(self.batch_size))
+            if not events:
+                break
+
+            archived_at = datetime.now()
+            for event in events:
+                event['archived_at'] = archived_at
+
+            # Insert before deleting so a crash never loses events; documents keep
+            # their _id, so a batch re-run after a crash only hits duplicate keys
+            try:
+                self.db.archive_collection.insert_many(events, ordered=False)
+            except BulkWriteError as e:
+                if any(error['code'] != 11000 for error in e.details.get('writeErrors', [])):
+                    raise
+
+            self.db.disaster_collection.delete_many({'_id': {'$in': [event['_id'] for event in events]}})
+            moved_count += len(events)
+            print(f"Archived {moved_count} events published before {cutoff}")
+
+        return moved_count
+
+    def run(self):
+        self.ensure_indexes()
+        compacted_count = self.compact_hot_events()
+        moved_count = self.archive_old_events()
+        return compacted_count, moved_count
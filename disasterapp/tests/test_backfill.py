@@ -0,0 +1,53 @@
+import os
+import sys
+from concurrent.futures import Future
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+# Add project directory to path so the models/utils packages resolve as they do for the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models.database as database
+from utils.backfill import BackfillJob
+
+class StubProcessor:
+    """Finds the comma-separated names in the title and geocodes them with a stub geocoder"""
+
+    def __init__(self, failing_names=()):
+        self.failing_names = set(failing_names)
+
+    def _lookup(self, name):
+        future = Future()
+        if name in self.failing_names:
+            future.set_exception(TimeoutError("geocoder timed out"))
+        else:
+            future.set_result({"latitude": 1.0, "longitude": 2.0, "country_code": "XX"})
+        return future
+
+    def request_article_locations(self, articles):
+        return [{name: self._lookup(name) for name in article["title"].split(", ")} for article in articles]
+
+    def location_record(self, location_name, result):
+        return {"name": location_name, **result}
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(database, "MongoClient", mongomock.MongoClient)
+    return database.Database()
+
+def test_failed_lookup_keeps_stored_locations_and_is_retried(db):
+    stored = [{"name": "Osaka"}, {"name": "Kobe"}, {"name": "Kyoto"}]
+    event_id = db.disaster_collection.insert_one({"title": "Osaka, Kobe, Kyoto", "locations": stored}).inserted_id
+
+    checkpoint = BackfillJob(db, max_docs_per_second=None, processor=StubProcessor({"Kobe"})).run()
+    assert db.disaster_collection.find_one({"_id": event_id})["locations"] == stored
+    assert checkpoint["failed_ids"] == [event_id]
+    assert checkpoint["completed_at"] is None
+
+    # The next run retries the event once the geocoder recovers
+    checkpoint = BackfillJob(db, max_docs_per_second=None, processor=StubProcessor()).run()
+    locations = db.disaster_collection.find_one({"_id": event_id})["locations"]
+    assert [location["name"] for location in locations] == ["Osaka", "Kobe", "Kyoto"]
+    assert checkpoint["failed_ids"] == [] and checkpoint["completed_at"]
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("geopy")
+
+# Add project directory to path so the utils package resolves as it does for the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.geocoding import AsyncGeocoder, GeocodeStore, GeocodingProvider
+
+class StubProvider(GeocodingProvider):
+    name = "stub"
+
+    def __init__(self, results):
+        super().__init__(rate=1000, capacity=1000)
+        self.results = results
+        self.calls = []
+
+    def geocode(self, location_name):
+        self.calls.append(location_name)
+        result = self.results[location_name]
+        if isinstance(result, Exception):
+            raise result
+        return dict(result) if result else None
+
+def test_store_answers_later_runs_without_the_provider(tmp_path, monkeypatch):
+    monkeypatch.setenv("GEOCODER_STATE_DIR", str(tmp_path))
+    path = str(tmp_path / "geocode_cache.jsonl")
+    provider = StubProvider({"Kobe": {"latitude": 34.69, "longitude": 135.19},
+                             "Atlantis": None,
+                             "Osaka": TimeoutError("provider timed out")})
+    geocoder = AsyncGeocoder(providers=[provider], store=GeocodeStore(path))
+    assert geocoder.submit("Kobe").result()["latitude"] == 34.69
+    assert geocoder.submit("Atlantis").result() is None
+    with pytest.raises(TimeoutError):
+        geocoder.submit("Osaka").result()
+
+    # A new process with no provider answers from the file; failed lookups were not recorded
+    store = GeocodeStore(path)
+    offline = AsyncGeocoder(providers=[], store=store)
+    assert offline.submit("  kobe ").result() == {"latitude": 34.69, "longitude": 135.19, "provider": "stub"}
+    assert store.get("atlantis") == (True, None)
+    assert store.get("osaka") == (False, None)
+
+def test_seeded_locations_skip_the_lookup():
+    geocoder = AsyncGeocoder(providers=[])
+    geocoder.seed([{"name": "Kerala", "latitude": 10.85, "longitude": 76.27, "geohash": "t9y0"}])
+    assert geocoder.submit("Kerala").result() == {"latitude": 10.85, "longitude": 76.27}
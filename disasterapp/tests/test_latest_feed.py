@@ -0,0 +1,31 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+# Add project directory to path so the models/utils packages resolve as they do for the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models.database as database
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(database, "MongoClient", mongomock.MongoClient)
+    return database.Database()
+
+def test_ensure_indexes_runs_against_mongomock(db):
+    db.disaster_collection.insert_one({"title": "Flood in Kerala", "disaster_type": "flood",
+                                       "publishedAt": datetime.now().isoformat()})
+    db.ensure_indexes()
+    db.ensure_indexes()
+
+    assert [event["title"] for event in db.get_latest_events()] == ["Flood in Kerala"]
+
+def test_feed_created_by_another_process_is_not_an_error(db, monkeypatch):
+    db.db.create_collection("latest_events")
+    # As if the other process created it between the check and create_collection
+    monkeypatch.setattr(db.db, "list_collection_names", lambda: [])
+    db.ensure_indexes()
@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+# Add project directory to path so the models/utils packages resolve as they do for the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models.database as database
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(database, "MongoClient", mongomock.MongoClient)
+    monkeypatch.setattr(database, "_local_search_index", None)
+    monkeypatch.setattr(database, "_local_search_synced_at", None)
+    return database.Database()
+
+def _event(title, disaster_type="flood", published_at="2030-01-01T00:00:00Z"):
+    return {"title": title, "description": "", "locations": [{"name": "Kerala"}],
+            "disaster_type": disaster_type, "publishedAt": published_at}
+
+def test_local_search_picks_up_events_inserted_elsewhere(db):
+    db.disaster_collection.insert_one(_event("Flood in Kerala"))
+    events, has_more = db.search_events("kerala")
+    assert [event["title"] for event in events] == ["Flood in Kerala"]
+    assert not has_more
+
+    # Inserted directly, as another process would, rather than via store_disaster_data
+    db.disaster_collection.insert_one(_event("Kerala landslide kills dozens", "landslide"))
+    events, _ = db.search_events("landslide")
+    assert [event["title"] for event in events] == ["Kerala landslide kills dozens"]
+    assert len(database._local_search_index) == 2
+
+def test_local_search_applies_filters_and_pages(db):
+    for i in range(5):
+        db.disaster_collection.insert_one(_event(f"Kerala flood update {i}"))
+    db.disaster_collection.insert_one(_event("Kerala quake", "earthquake"))
+
+    events, has_more = db.search_events("kerala", {"disaster_type": "flood"}, page=1, page_size=3)
+    assert len(events) == 3 and has_more
+    events, has_more = db.search_events("kerala", {"disaster_type": "flood"}, page=2, page_size=3)
+    assert len(events) == 2 and not has_more
+    assert all(event["disaster_type"] == "flood" for event in events)
+
+def test_text_search_errors_on_a_real_server_are_not_hidden(db, monkeypatch):
+    def broken_text_search(text, filters, limit):
+        raise TypeError("bug in _text_search")
+
+    monkeypatch.setattr(db, "_text_search", broken_text_search)
+    monkeypatch.setattr(database, "mongomock", None)
+    with pytest.raises(TypeError):
+        db.search_events("kerala")
+    assert database._local_search_index is None
+
+def test_warm_local_search_index_builds_in_background(db):
+    db.disaster_collection.insert_one(_event("Flood in Kerala"))
+    assert db.warm_local_search_index()
+
+    # The first search waits for the build instead of starting its own
+    events, _ = db.search_events("kerala")
+    assert [event["title"] for event in events] == ["Flood in Kerala"]
+    assert len(database._local_search_index) == 1
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+# Add project directory to path so the utils package resolves as it does for the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import raw_archive
+from utils.raw_archive import RawArchive
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_write_then_iter_articles_round_trip(tmp_path, compression):
+    if compression == "zstd" and raw_archive.zstandard is None:
+        pytest.skip("zstandard is not installed")
+
+    archive = RawArchive(base_dir=str(tmp_path), compression=compression)
+    with archive.writer() as writer:
+        writer.write('flood', {'q': 'flood'},
+                     {'status': 'ok', 'articles': [{'url': 'u1', 'title': 'Rivers rise'}]})
+        writer.write('combined', {'q': 'quake OR flood'},
+                     {'status': 'ok', 'articles': [{'url': 'u2', 'title': 'Quake hits Chile'},
+                                                   {'url': 'u3', 'title': 'Markets close higher'}]},
+                     mode='combined')
+
+    segments = list(archive.iter_segments())
+    assert len(segments) == 2
+    assert all(path.endswith(raw_archive.EXTENSIONS[compression]) for path in segments)
+
+    articles = {article['url']: article for article in archive.iter_articles()}
+    assert set(articles) == {'u1', 'u2'}
+    assert articles['u1']['disaster_type'] == 'flood'
+    assert articles['u2']['disaster_type'] == 'earthquake'
+
+    flood_only = list(archive.iter_articles(keywords=['flood']))
+    assert [article['url'] for article in flood_only] == ['u1']
+
+def test_keyword_filter_includes_matching_combined_articles(tmp_path):
+    archive = RawArchive(base_dir=str(tmp_path), compression="gzip")
+    with archive.writer() as writer:
+        writer.write('earthquake', {'q': 'earthquake'},
+                     {'status': 'ok', 'articles': [{'url': 'u1', 'title': 'Quake hits Chile'}]})
+        writer.write('combined', {'q': 'quake OR flood'},
+                     {'status': 'ok', 'articles': [{'url': 'u2', 'title': 'Rivers flood the valley'},
+                                                   {'url': 'u3', 'title': 'Strong quake in Japan'}]},
+                     mode='combined')
+
+    flood_only = list(archive.iter_articles(keywords=['flood']))
+    assert [(article['url'], article['disaster_type']) for article in flood_only] == [('u2', 'flood')]
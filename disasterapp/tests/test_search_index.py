@@ -0,0 +1,52 @@
+import math
+import os
+import random
+import sys
+
+# Add project directory to path so the utils package resolves as it does for the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.search_index import BM25Index, tokenize
+
+WORDS = "flood quake japan chile storm rain fire kerala tokyo river dam wind".split()
+
+def _random_index(count, seed=1):
+    rng = random.Random(seed)
+    index = BM25Index()
+    for i in range(count):
+        index.add(i, {"title": " ".join(rng.choices(WORDS, k=rng.randint(2, 8))),
+                      "description": " ".join(rng.choices(WORDS, k=rng.randint(0, 20))),
+                      "disaster_type": rng.choice(["flood", "earthquake"]),
+                      "publishedAt": f"2030-01-{rng.randint(1, 28):02d}"})
+    return index
+
+def _score(index, query, doc_id):
+    """BM25 score of a document computed straight from the term frequencies"""
+    score = 0.0
+    for token in set(tokenize(query)):
+        postings = index.postings[token]
+        frequency = postings.get(doc_id, 0)
+        idf = math.log(1 + (len(index) - len(postings) + 0.5) / (len(postings) + 0.5))
+        norm = index.k1 * (1 - index.b + index.b * index.doc_lengths[doc_id] / index.norm_length)
+        score += idf * frequency * (index.k1 + 1) / (frequency + norm)
+    return round(score, 9)
+
+def test_top_k_search_matches_full_ranking():
+    index = _random_index(2000)
+
+    def recent_floods(disaster_type, published_at):
+        return disaster_type == "flood" and published_at > "2030-01-20"
+
+    for query in ["japan", "flood chile", "storm rain fire kerala"]:
+        for matches in (None, recent_floods):
+            full = index.search(query, matches)
+            top = index.search(query, matches, limit=21)
+            # Ties may come back in either order, so compare scores rather than ids
+            assert [_score(index, query, doc_id) for doc_id in top] == \
+                   [_score(index, query, doc_id) for doc_id in full[:21]]
+
+def test_documents_added_after_a_search_are_found():
+    index = _random_index(200)
+    index.search("japan", limit=5)
+    index.add("new", {"title": "Japan japan japan", "description": ""})
+    assert index.search("japan", limit=1) == ["new"]
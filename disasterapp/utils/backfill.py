@@ -0,0 +1,157 @@
+import time
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+
+class BackfillJob:
+    """Re-runs location extraction over stored events in _id order, resuming from a checkpoint"""
+
+    def __init__(self, db, name='locations', batch_size=200, max_docs_per_second=100,
+                 processor=None):
+        self.db = db
+        self.name = name
+        self.batch_size = batch_size
+        self.max_docs_per_second = max_docs_per_second
+        if processor is None:
+            # Imported here: DataProcessor loads the spaCy model
+            from .data_processor import DataProcessor
+            processor = DataProcessor()
+        self.processor = processor
+        self.checkpoints_collection = db.backfill_checkpoints_collection
+
+    def _load_checkpoint(self, restart=False):
+        if restart:
+            self.checkpoints_collection.delete_one({'_id': self.name})
+
+        checkpoint = self.checkpoints_collection.find_one({'_id': self.name})
+        if checkpoint:
+            return checkpoint
+
+        return {
+            '_id': self.name,
+            'last_id': None,
+            'processed': 0,
+            'updated': 0,
+            'failed_ids': [],
+            'started_at': datetime.now().isoformat(),
+            'completed_at': None
+        }
+
+    def _save_checkpoint(self, checkpoint):
+        checkpoint['updated_at'] = datetime.now().isoformat()
+        self.checkpoints_collection.replace_one({'_id': self.name}, checkpoint, upsert=True)
+
+    def _build_updates(self, events):
+        """Re-extract locations for a batch; returns updates for events whose locations changed
+        and the ids of events with a failed lookup"""
+        pending = self.processor.request_article_locations(events)
+        now = datetime.now().isoformat()
+
+        operations = []
+        failed_ids = []
+        for event, futures in zip(events, pending):
+            locations = []
+            try:
+                for location_name, future in futures.items():
+                    result = future.result()
+                    if result:
+                        locations.append(self.processor.location_record(location_name, result))
+            except Exception as e:
+                # Transient failure (timeout, network, rate limit): writing the names that did
+                # resolve would drop the others from the event, so leave it for a retry
+                print(f"Error geocoding {location_name} for event {event['_id']}: {str(e)}")
+                failed_ids.append(event['_id'])
+                continue
+
+            # Keep the stored locations when extraction or geocoding finds nothing
+            if not locations or locations == event.get('locations'):
+                continue
+            operations.append(UpdateOne(
+                {'_id': event['_id']},
+                {'$set': {'locations': locations, 'reprocessed_at': now}}
+            ))
+        return operations, failed_ids
+
+    def _process_batch(self, events, checkpoint):
+        operations, failed_ids = self._build_updates(events)
+        if operations:
+            result = self.db.disaster_collection.bulk_write(operations, ordered=False)
+            checkpoint['updated'] += result.modified_count
+        checkpoint['failed_ids'].extend(failed_ids)
+
+    def _retry_failed(self, checkpoint):
+        """Re-run the events whose lookups failed on an earlier run"""
+        retry_ids = checkpoint['failed_ids']
+        checkpoint['failed_ids'] = []
+        for start in range(0, len(retry_ids), self.batch_size):
+            batch_ids = retry_ids[start:start + self.batch_size]
+            events = list(self.db.disaster_collection.find(
+                {'_id': {'$in': batch_ids}}, {'title': 1, 'description': 1, 'locations': 1}))
+            self._process_batch(events, checkpoint)
+        self._save_checkpoint(checkpoint)
+        print(f"Backfill '{self.name}': retried {len(retry_ids)} events, "
+              f"{len(checkpoint['failed_ids'])} still failing")
+
+    def run(self, restart=False):
+        """Process the collection from the last checkpoint; returns the final checkpoint"""
+        checkpoint = self._load_checkpoint(restart)
+        if checkpoint.get('completed_at'):
+            print(f"Backfill '{self.name}' already completed; use restart to run it again")
+            return checkpoint
+
+        checkpoint.setdefault('failed_ids', [])
+        if checkpoint['failed_ids']:
+            self._retry_failed(checkpoint)
+
+        collection = self.db.disaster_collection
+        remaining_query = {'_id': {'$gt': checkpoint['last_id']}} if checkpoint['last_id'] else {}
+        remaining = collection.count_documents(remaining_query)
+        print(f"Backfill '{self.name}': {remaining} events to process "
+              f"({checkpoint['processed']} already done)")
+
+        started = time.monotonic()
+        processed_this_run = 0
+
+        while True:
+            batch_started = time.monotonic()
+            query = {'_id': {'$gt': checkpoint['last_id']}} if checkpoint['last_id'] else {}
+            events = list(collection.find(query, {'title': 1, 'description': 1, 'locations': 1})
+                          .sort('_id', 1).limit(self.batch_size))
+            if not events:
+                break
+
+            self._process_batch(events, checkpoint)
+
+            # The checkpoint is written only after the batch is applied, so a
+            # crash re-runs at most one batch and the updates are idempotent
+            checkpoint['last_id'] = events[-1]['_id']
+            checkpoint['processed'] += len(events)
+            self._save_checkpoint(checkpoint)
+            processed_this_run += len(events)
+
+            elapsed = time.monotonic() - started
+            rate = processed_this_run / elapsed if elapsed else 0.0
+            left = max(remaining - processed_this_run, 0)
+            eta = timedelta(seconds=int(left / rate)) if rate else 'unknown'
+            print(f"Backfill '{self.name}': {checkpoint['processed']} processed, "
+                  f"{checkpoint['updated']} updated, {len(checkpoint['failed_ids'])} failed, "
+                  f"{rate:.1f} events/s, ETA {eta}")
+
+            # Throttle so live ingest and dashboard queries keep their share of the database
+            if self.max_docs_per_second:
+                min_duration = len(events) / self.max_docs_per_second
+                batch_duration = time.monotonic() - batch_started
+                if batch_duration < min_duration:
+                    time.sleep(min_duration - batch_duration)
+
+        # Events with failed lookups keep the job open so the next run retries them
+        if checkpoint['failed_ids']:
+            self._save_checkpoint(checkpoint)
+            print(f"Backfill '{self.name}': {len(checkpoint['failed_ids'])} events failed geocoding "
+                  f"and will be retried on the next run")
+            return checkpoint
+
+        checkpoint['completed_at'] = datetime.now().isoformat()
+        self._save_checkpoint(checkpoint)
+        print(f"Backfill '{self.name}' completed: {checkpoint['processed']} processed, "
+              f"{checkpoint['updated']} updated")
+        return checkpoint
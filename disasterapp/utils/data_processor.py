@@ -3,13 +3,15 @@ from datetime import datetime
 from .location_extractor import LocationExtractor
 
 class DataProcessor:
-    def __init__(self):
-        self.location_extractor = LocationExtractor()
+    def __init__(self, geocoder=None):
+        self.location_extractor = LocationExtractor(geocoder=geocoder)
     
     def process_articles(self, articles):
         """Process raw news articles and extract relevant information"""
-        processed_data = []
+        pending = []
         
+        # Run NER on every article first; geocoding of the names found so far
+        # proceeds in the background while later articles are being parsed
         for article in articles:
             try:
                 # Extract basic information
@@ -21,29 +23,51 @@ class DataProcessor:
                     "urlToImage": article.get("urlToImage"),
                     "publishedAt": article.get("publishedAt"),
                     "source": article.get("source", {}).get("name"),
-                    "disaster_type": article.get("disaster_type")
+                    "disaster_type": article.get("disaster_type"),
+                    "disaster_types": article.get("disaster_types") or [article.get("disaster_type")]
                 }
                 
                 # Extract locations from title and description
-                text_to_analyze = f"{article.get('title', '')} {article.get('description', '')}"
-                location_names = self.location_extractor.extract_locations(text_to_analyze)
-                
-                locations_with_coords = []
-                for loc_name in location_names:
-                    loc_data = self.location_extractor.get_coordinates(loc_name)
-                    if loc_data:
-                        locations_with_coords.append(loc_data)
-                
-                processed_article["locations"] = locations_with_coords
-                
-                # Only add articles that have at least one valid location
-                if locations_with_coords:
-                    processed_data.append(processed_article)
+                pending.append((processed_article, self._request_locations(article)))
                 
             except Exception as e:
                 print(f"Error processing article: {str(e)}")
         
+        processed_data = []
+        for processed_article, futures in pending:
+            locations_with_coords = self._resolve_locations(futures)
+            processed_article["locations"] = locations_with_coords
+            
+            # Only add articles that have at least one valid location
+            if locations_with_coords:
+                processed_data.append(processed_article)
+        
         return processed_data
+    
+    def extract_article_locations(self, articles):
+        """Extract and geocode the locations of each article, geocoding the whole batch in parallel"""
+        return [self._resolve_locations(futures) for futures in self.request_article_locations(articles)]
+    
+    def request_article_locations(self, articles):
+        """Run NER over a batch and start geocoding it; returns a {name: future} dict per article"""
+        return [self._request_locations(article) for article in articles]
+    
+    def location_record(self, location_name, result):
+        return self.location_extractor.location_record(location_name, result)
+    
+    def _request_locations(self, article):
+        """Run NER on an article and start geocoding the names found"""
+        text_to_analyze = f"{article.get('title', '')} {article.get('description', '')}"
+        location_names = self.location_extractor.extract_locations(text_to_analyze)
+        return self.location_extractor.request_coordinates(location_names)
+    
+    def _resolve_locations(self, futures):
+        locations_with_coords = []
+        for loc_name, future in futures.items():
+            loc_data = self.location_extractor.resolve_coordinates(loc_name, future)
+            if loc_data:
+                locations_with_coords.append(loc_data)
+        return locations_with_coords
 
 if __name__ == "__main__":
     # Load the raw data for testing
@@ -0,0 +1,60 @@
+import re
+
+# Terms that identify each disaster type, including common synonyms used in headlines
+DISASTER_SYNONYMS = {
+    'earthquake': ['earthquake', 'quake', 'tremor', 'aftershock', 'seismic'],
+    'flood': ['flood', 'flooding', 'flash flood', 'inundation', 'deluge'],
+    'hurricane': ['hurricane'],
+    'tsunami': ['tsunami', 'tidal wave'],
+    'wildfire': ['wildfire', 'bushfire', 'forest fire', 'brush fire', 'grass fire'],
+    'tornado': ['tornado', 'twister'],
+    'cyclone': ['cyclone', 'typhoon', 'tropical storm'],
+    'landslide': ['landslide', 'mudslide', 'rockslide', 'mudflow'],
+    'volcano': ['volcano', 'volcanic', 'eruption', 'lava'],
+    'drought': ['drought', 'dry spell', 'water shortage'],
+}
+
+# Matches in the title say more about the article than matches in the body
+FIELD_WEIGHTS = {'title': 3, 'description': 2, 'content': 1}
+
+class DisasterClassifier:
+    def __init__(self, synonyms=None):
+        self.synonyms = synonyms or DISASTER_SYNONYMS
+        self.pattern = self._compile(self.synonyms)
+
+    @staticmethod
+    def _compile(synonyms):
+        """Compile all terms into one regex with a named group per disaster type"""
+        groups = []
+        for disaster_type, terms in synonyms.items():
+            # Longest terms first so "flash flood" wins over "flood"
+            alternatives = "|".join(re.escape(term).replace(r"\ ", r"\s+")
+                                    for term in sorted(terms, key=len, reverse=True))
+            groups.append(f"(?P<{disaster_type}>{alternatives})")
+
+        # Allow simple plurals/inflections such as "floods", "quakes", "tornadoes"
+        return re.compile(r"\b(?:" + "|".join(groups) + r")(?:e?s|ed|ing)?\b", re.IGNORECASE)
+
+    def query_terms(self):
+        """All terms, quoted where needed, for use in a NewsAPI query"""
+        terms = []
+        for disaster_terms in self.synonyms.values():
+            for term in disaster_terms:
+                terms.append(f'"{term}"' if " " in term else term)
+        return terms
+
+    def score(self, article):
+        """Weighted match counts per disaster type for an article"""
+        scores = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            text = article.get(field)
+            if not text:
+                continue
+            for match in self.pattern.finditer(text):
+                scores[match.lastgroup] = scores.get(match.lastgroup, 0) + weight
+        return scores
+
+    def classify(self, article):
+        """Return all matching disaster types, best match first"""
+        scores = self.score(article)
+        return sorted(scores, key=lambda disaster_type: scores[disaster_type], reverse=True)
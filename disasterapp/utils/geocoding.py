@@ -0,0 +1,268 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from geopy.geocoders import Nominatim
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are shared between threads only
+    fcntl = None
+
+USER_AGENT = "disaster_monitoring_app"
+STATE_DIR = os.getenv('GEOCODER_STATE_DIR', os.path.join(tempfile.gettempdir(), 'disaster_app_geocoder'))
+# Kept next to the raw archive so the two together replay without the network
+GEOCODE_CACHE_PATH = os.getenv('GEOCODE_CACHE_PATH', os.path.join('data', 'geocode_cache.jsonl'))
+
+def normalize_location_name(location_name):
+    """Key used to coalesce and cache lookups of the same place"""
+    return " ".join(location_name.casefold().split())
+
+def get_address_details(raw):
+    """Extract country and first-level admin area from a Nominatim result"""
+    address = (raw or {}).get("address", {})
+    country_code = address.get("country_code")
+
+    return {
+        "country_code": country_code.upper() if country_code else None,
+        "country": address.get("country"),
+        "admin1": (address.get("state") or address.get("province")
+                   or address.get("region") or address.get("state_district"))
+    }
+
+class TokenBucket:
+    """Token bucket shared by all threads, and by all processes when given a state file"""
+
+    def __init__(self, rate, capacity=1, state_path=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.state_path = state_path if fcntl else None
+        self._lock = threading.Lock()
+        self._state = {'tokens': capacity, 'updated': time.time()}
+
+    def _take(self, state):
+        """Take one token from the state, returning how long the caller must wait for it"""
+        now = time.time()
+        tokens = min(self.capacity, state['tokens'] + (now - state['updated']) * self.rate)
+
+        # Tokens may go negative: that is a reservation later callers queue behind
+        state['tokens'] = tokens - 1
+        state['updated'] = now
+        return max(0.0, -state['tokens'] / self.rate)
+
+    def _reserve(self):
+        with self._lock:
+            if not self.state_path:
+                return self._take(self._state)
+
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(self.state_path, 'a+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                data = f.read()
+                state = json.loads(data) if data else dict(self._state)
+                wait = self._take(state)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+            return wait
+
+    def acquire(self):
+        time.sleep(self._reserve())
+
+    async def acquire_async(self):
+        await asyncio.sleep(self._reserve())
+
+class GeocodeStore:
+    """Provider answers persisted as JSONL, shared by every process and run, so a name is
+    only ever sent to a provider once; "not found" answers are kept too"""
+
+    def __init__(self, path=None):
+        self.path = path or GEOCODE_CACHE_PATH
+        self._lock = threading.Lock()
+        self._results = None
+
+    def _load(self):
+        results = {}
+        if not os.path.exists(self.path):
+            return results
+
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; the name is looked up again
+                    continue
+                results[record['key']] = record['result']
+        return results
+
+    def get(self, key):
+        """(found, result) for a normalized name; result is None for a recorded miss"""
+        with self._lock:
+            if self._results is None:
+                self._results = self._load()
+            if key in self._results:
+                return True, self._results[key]
+            return False, None
+
+    def put(self, key, result):
+        line = json.dumps({'key': key, 'result': result}) + '\n'
+        with self._lock:
+            if self._results is None:
+                self._results = self._load()
+            self._results[key] = result
+
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a') as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                f.write(line)
+
+class GeocodingProvider:
+    """Base class for geocoding backends; each provider has its own rate limit"""
+    name = None
+
+    def __init__(self, rate=1.0, capacity=1):
+        state_path = os.path.join(STATE_DIR, f"{self.name}.json")
+        self.bucket = TokenBucket(rate, capacity, state_path=state_path)
+
+    def geocode(self, location_name):
+        """Return latitude/longitude/address details for a name, or None if not found"""
+        raise NotImplementedError
+
+class NominatimProvider(GeocodingProvider):
+    name = "nominatim"
+
+    def __init__(self, rate=1.0, capacity=1, user_agent=USER_AGENT):
+        # Nominatim's usage policy allows at most one request per second
+        super().__init__(rate=rate, capacity=capacity)
+        self.geolocator = Nominatim(user_agent=user_agent)
+
+    def geocode(self, location_name):
+        location = self.geolocator.geocode(location_name, addressdetails=True, language="en")
+        if not location:
+            return None
+
+        result = {
+            "latitude": location.latitude,
+            "longitude": location.longitude,
+            "address": location.address
+        }
+        result.update(get_address_details(location.raw))
+        return result
+
+class AsyncGeocoder:
+    """Geocodes names in parallel within provider rate limits, coalescing duplicate lookups"""
+
+    def __init__(self, providers=None, max_concurrency=8, cache_size=10000, store=None):
+        # An empty provider list answers from the store and seeded results only
+        self.providers = [NominatimProvider()] if providers is None else providers
+        self.store = store
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="geocoder")
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._cache = OrderedDict()
+
+    def _lookup(self, location_name):
+        """Try each provider in turn, waiting for its rate limit before each request"""
+        key = normalize_location_name(location_name)
+        if self.store:
+            found, result = self.store.get(key)
+            if found:
+                return result
+
+        last_error = None
+        answered = False
+
+        for provider in self.providers:
+            provider.bucket.acquire()
+            try:
+                result = provider.geocode(location_name)
+            except Exception as e:
+                print(f"Error geocoding {location_name} with {provider.name}: {str(e)}")
+                last_error = e
+                continue
+
+            answered = True
+            if result:
+                result["provider"] = provider.name
+                break
+
+        # Only cache "not found" when a provider actually answered
+        if not answered:
+            if last_error:
+                raise last_error
+            return None
+
+        if self.store:
+            self.store.put(key, result)
+        return result
+
+    def _complete(self, key, future):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if future.exception() is None:
+                self._cache[key] = future.result()
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+    def seed(self, locations):
+        """Prime the in-memory cache with location records resolved earlier, e.g. stored events"""
+        with self._lock:
+            for location in locations:
+                result = {key: value for key, value in location.items() if key not in ('name', 'geohash')}
+                self._cache[normalize_location_name(location['name'])] = result
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+    def submit(self, location_name):
+        """Start a lookup without blocking; concurrent requests for one place share a future"""
+        key = normalize_location_name(location_name)
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                future = Future()
+                future.set_result(self._cache[key])
+                return future
+
+            if key in self._in_flight:
+                return self._in_flight[key]
+
+            future = self._executor.submit(self._lookup, location_name)
+            self._in_flight[key] = future
+
+        future.add_done_callback(lambda f: self._complete(key, f))
+        return future
+
+    async def geocode(self, location_name):
+        return await asyncio.wrap_future(self.submit(location_name))
+
+    async def geocode_many(self, location_names):
+        """Geocode the unique names of a batch in parallel; returns results keyed by name"""
+        unique_names = list(dict.fromkeys(location_names))
+        results = await asyncio.gather(*(self.geocode(name) for name in unique_names))
+        return dict(zip(unique_names, results))
+
+    def geocode_batch(self, location_names):
+        """Blocking variant of geocode_many for callers outside an event loop"""
+        futures = {name: self.submit(name) for name in dict.fromkeys(location_names)}
+        return {name: future.result() for name, future in futures.items()}
+
+_default_geocoder = None
+_default_geocoder_lock = threading.Lock()
+
+def get_default_geocoder():
+    """Process-wide geocoder so every LocationExtractor shares one cache and rate limit"""
+    global _default_geocoder
+    with _default_geocoder_lock:
+        if _default_geocoder is None:
+            _default_geocoder = AsyncGeocoder(store=GeocodeStore())
+        return _default_geocoder
@@ -0,0 +1,83 @@
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Precision stored on each location; coarser cells are prefixes of it
+MAX_PRECISION = 5
+
+# Precisions kept in the rollup: ~2500km, ~630km, ~160km, ~40km cells
+ROLLUP_PRECISIONS = (1, 2, 3, 4)
+
+def encode(latitude, longitude, precision=MAX_PRECISION):
+    """Geohash of a point at the given precision"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    cell = []
+    bits = 0
+    bit_count = 0
+    use_longitude = True
+
+    while len(cell) < precision:
+        value_range, value = (lon_range, longitude) if use_longitude else (lat_range, latitude)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = bits * 2 + 1
+            value_range[0] = mid
+        else:
+            bits = bits * 2
+            value_range[1] = mid
+
+        use_longitude = not use_longitude
+        bit_count += 1
+        if bit_count == 5:
+            cell.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(cell)
+
+def bounds(cell):
+    """(min_lat, min_lon, max_lat, max_lon) of a geohash cell"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    use_longitude = True
+
+    for char in cell:
+        bits = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            value_range = lon_range if use_longitude else lat_range
+            mid = (value_range[0] + value_range[1]) / 2
+            if (bits >> shift) & 1:
+                value_range[0] = mid
+            else:
+                value_range[1] = mid
+            use_longitude = not use_longitude
+
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+def center(cell):
+    """(latitude, longitude) of the centre of a geohash cell"""
+    min_lat, min_lon, max_lat, max_lon = bounds(cell)
+    return (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+
+def polygon(cell):
+    """GeoJSON polygon ring of a geohash cell"""
+    min_lat, min_lon, max_lat, max_lon = bounds(cell)
+    return [[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]]
+
+def cell_counts(events, precision):
+    """Per-cell event counts for a list of events, shaped like the rollup aggregation"""
+    counts = {}
+    for event in events:
+        cells = set()
+        for loc in event.get('locations', []):
+            if loc.get('latitude') is None or loc.get('longitude') is None:
+                continue
+            cell = loc.get('geohash') or encode(loc['latitude'], loc['longitude'])
+            cells.add(cell[:precision])
+        for cell in cells:
+            counts[cell] = counts.get(cell, 0) + 1
+
+    results = []
+    for cell, count in counts.items():
+        latitude, longitude = center(cell)
+        results.append({'_id': cell, 'count': count, 'latitude': latitude, 'longitude': longitude})
+    return results
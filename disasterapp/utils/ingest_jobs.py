@@ -0,0 +1,134 @@
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+from .news_api import NewsDataCollector
+from .data_processor import DataProcessor
+from .raw_archive import RawArchive
+
+ACTIVE_STATUSES = ['queued', 'running']
+
+class IngestJobManager:
+    """Runs fetch/process/store ingestion in a background thread, tracked by a job record in MongoDB"""
+
+    def __init__(self, db, chunk_size=20, stale_after=timedelta(minutes=30)):
+        self.db = db
+        self.jobs_collection = db.ingest_jobs_collection
+        self.chunk_size = chunk_size
+        self.stale_after = stale_after
+
+        # Only one job may hold the active key at a time, across all app processes
+        self.jobs_collection.create_index('active_key', unique=True, sparse=True)
+        self.jobs_collection.create_index([('created_at', DESCENDING)])
+
+    def start_job(self, days_back=7):
+        """Start an ingestion run, or return the one already running. Returns (job, started)"""
+        self._expire_stale_jobs()
+
+        now = datetime.now().isoformat()
+        job = {
+            '_id': uuid.uuid4().hex,
+            'active_key': 'ingest',
+            'status': 'queued',
+            'stage': 'queued',
+            'days_back': days_back,
+            'fetched': 0,
+            'processed': 0,
+            'stored': 0,
+            'cancel_requested': False,
+            'error': None,
+            'created_at': now,
+            'heartbeat_at': now,
+            'finished_at': None
+        }
+
+        try:
+            self.jobs_collection.insert_one(job)
+        except DuplicateKeyError:
+            return self.get_active_job(), False
+
+        thread = threading.Thread(target=self._run, args=(job['_id'], days_back), daemon=True)
+        thread.start()
+        return job, True
+
+    def cancel_job(self, job_id):
+        """Ask a running job to stop after its current chunk"""
+        self.jobs_collection.update_one(
+            {'_id': job_id, 'status': {'$in': ACTIVE_STATUSES}},
+            {'$set': {'cancel_requested': True}}
+        )
+
+    def get_job(self, job_id):
+        return self.jobs_collection.find_one({'_id': job_id})
+
+    def get_active_job(self):
+        return self.jobs_collection.find_one({'active_key': {'$exists': True}})
+
+    def get_latest_job(self):
+        return self.jobs_collection.find_one(sort=[('created_at', DESCENDING)])
+
+    def _expire_stale_jobs(self):
+        """Release jobs whose worker stopped sending heartbeats, e.g. after a server restart"""
+        cutoff = (datetime.now() - self.stale_after).isoformat()
+        self.jobs_collection.update_many(
+            {'active_key': {'$exists': True}, 'heartbeat_at': {'$lt': cutoff}},
+            {'$set': {'status': 'failed', 'error': 'Job stopped responding',
+                      'finished_at': datetime.now().isoformat()},
+             '$unset': {'active_key': ''}}
+        )
+
+    def _update(self, job_id, inc=None, **fields):
+        fields['heartbeat_at'] = datetime.now().isoformat()
+        update = {'$set': fields}
+        if inc:
+            update['$inc'] = inc
+        self.jobs_collection.update_one({'_id': job_id}, update)
+
+    def _finish(self, job_id, status, error=None):
+        self.jobs_collection.update_one(
+            {'_id': job_id},
+            {'$set': {'status': status, 'stage': status, 'error': error,
+                      'finished_at': datetime.now().isoformat()},
+             '$unset': {'active_key': ''}}
+        )
+
+    def _cancel_requested(self, job_id):
+        job = self.jobs_collection.find_one({'_id': job_id}, {'cancel_requested': 1})
+        return bool(job and job.get('cancel_requested'))
+
+    def _run(self, job_id, days_back):
+        try:
+            self._update(job_id, status='running', stage='fetching')
+            collector = NewsDataCollector(archive=RawArchive())
+
+            def fetch_progress(fetched):
+                # Report each request so the fetch stage shows progress and stays cancellable
+                self._update(job_id, fetched=fetched)
+                return not self._cancel_requested(job_id)
+
+            raw_articles = collector.fetch_disaster_news(days_back=days_back, progress=fetch_progress)
+
+            if self._cancel_requested(job_id):
+                self._finish(job_id, 'cancelled')
+                return
+
+            self._update(job_id, stage='processing', fetched=len(raw_articles))
+            processor = DataProcessor()
+
+            # Process and store in chunks so progress is visible and cancellation is prompt
+            for start in range(0, len(raw_articles), self.chunk_size):
+                if self._cancel_requested(job_id):
+                    self._finish(job_id, 'cancelled')
+                    return
+
+                chunk = raw_articles[start:start + self.chunk_size]
+                processed_articles = processor.process_articles(chunk)
+                new_count = self.db.store_disaster_data(processed_articles)
+                self._update(job_id, inc={'processed': len(chunk), 'stored': new_count})
+
+            self._finish(job_id, 'completed')
+        except Exception as e:
+            print(f"Error in ingest job {job_id}: {str(e)}")
+            self._finish(job_id, 'failed', error=str(e))
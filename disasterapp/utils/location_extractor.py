@@ -1,14 +1,11 @@
 import spacy
-import geopy.geocoders
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
+from .geocoding import get_default_geocoder
+from .geohash import encode as geohash_encode
 
 class LocationExtractor:
-    def __init__(self):
+    def __init__(self, geocoder=None):
         self.nlp = spacy.load("en_core_web_sm")
-        geopy.geocoders.options.default_user_agent = "disaster_monitoring_app"
-        self.geolocator = Nominatim(user_agent="disaster_monitoring_app")
-        self.geocode = RateLimiter(self.geolocator.geocode, min_delay_seconds=1)
+        self.geocoder = geocoder or get_default_geocoder()
     
     def extract_locations(self, text):
         """Extract location entities from text using SpaCy NER"""
@@ -25,16 +22,25 @@ class LocationExtractor:
         return list(set(locations))  # Remove duplicates
     
     def get_coordinates(self, location_name):
-        """Get latitude and longitude for a location name"""
+        """Get latitude, longitude and structured address details for a location name"""
+        return self.resolve_coordinates(location_name, self.geocoder.submit(location_name))
+    
+    def request_coordinates(self, location_names):
+        """Start geocoding names in the background; returns a future per unique name"""
+        return {name: self.geocoder.submit(name) for name in dict.fromkeys(location_names)}
+    
+    def location_record(self, location_name, result):
+        """Build the stored location record from a geocoding result"""
+        # Assign the location to its grid cell; coarser cells are prefixes
+        geohash = geohash_encode(result["latitude"], result["longitude"])
+        return {"name": location_name, **result, "geohash": geohash}
+    
+    def resolve_coordinates(self, location_name, future):
+        """Wait for a geocoding future and build the location record"""
         try:
-            location = self.geocode(location_name)
-            if location:
-                return {
-                    "name": location_name,
-                    "latitude": location.latitude,
-                    "longitude": location.longitude,
-                    "address": location.address
-                }
+            result = future.result()
+            if result:
+                return self.location_record(location_name, result)
             return None
         except Exception as e:
             print(f"Error geocoding {location_name}: {str(e)}")
@@ -1,51 +1,151 @@
 import os
 import json
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from newsapi import NewsApiClient
 from dotenv import load_dotenv
+from .disaster_classifier import DisasterClassifier
 
 load_dotenv()
 
 class NewsDataCollector:
-    def __init__(self):
+    def __init__(self, archive=None):
+        self.archive = archive
         self.api_key = os.getenv('NEWS_API_KEY')
         self.newsapi = NewsApiClient(api_key=self.api_key)
         self.disaster_keywords = [
             'earthquake', 'flood', 'hurricane', 'tsunami', 'wildfire',
             'tornado', 'cyclone', 'landslide', 'volcano', 'drought'
         ]
+        self.classifier = DisasterClassifier()
     
-    def fetch_disaster_news(self, days_back=7):
-        """Fetch news articles related to disasters from the past days_back days"""
+    def fetch_disaster_news(self, days_back=7, combined=False, progress=None):
+        """Fetch news articles related to disasters from the past days_back days
+        
+        progress(fetched) is called after each API request with the number of articles
+        so far; fetching stops early when it returns False.
+        """
+        if combined:
+            return self.fetch_disaster_news_combined(days_back=days_back, progress=progress)
+        
         from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
         to_date = datetime.now().strftime('%Y-%m-%d')
         all_articles = []
         
-        for keyword in self.disaster_keywords:
-            print(f"Fetching news for keyword: {keyword}")
-            try:
-                response = self.newsapi.get_everything(
-                    q=keyword,
-                    from_param=from_date,
-                    to=to_date,
-                    language='en',
-                    sort_by='publishedAt',
-                    page_size=100
-                )
+        with self._archive_writer() as archive_writer:
+            for keyword in self.disaster_keywords:
+                print(f"Fetching news for keyword: {keyword}")
+                try:
+                    params = {
+                        'q': keyword,
+                        'from_param': from_date,
+                        'to': to_date,
+                        'language': 'en',
+                        'sort_by': 'publishedAt',
+                        'page_size': 100
+                    }
+                    response = self.newsapi.get_everything(**params)
+                    
+                    if response['status'] == 'ok':
+                        # Keep the untouched response so it can be replayed later
+                        if archive_writer:
+                            archive_writer.write(keyword, params, response)
+                        
+                        # Add disaster type to each article
+                        for article in response['articles']:
+                            article['disaster_type'] = keyword
+                        all_articles.extend(response['articles'])
+                        print(f"Found {len(response['articles'])} articles for {keyword}")
+                    else:
+                        print(f"Error fetching articles for {keyword}: {response['status']}")
+                        
+                except Exception as e:
+                    print(f"Error fetching articles for {keyword}: {str(e)}")
                 
-                if response['status'] == 'ok':
-                    # Add disaster type to each article
+                if progress and progress(len(all_articles)) is False:
+                    print("Fetching stopped early")
+                    break
+        
+        print(f"Total articles collected: {len(all_articles)}")
+        return all_articles
+    
+    def _archive_writer(self):
+        """Archive writer for one collection run, or a no-op context when archiving is off"""
+        return self.archive.writer() if self.archive else nullcontext()
+    
+    def build_combined_queries(self, max_query_length=500):
+        """Join all disaster terms into as few OR queries as the API query length allows"""
+        queries = []
+        current = []
+        for term in self.classifier.query_terms():
+            if current and len(" OR ".join(current + [term])) > max_query_length:
+                queries.append(" OR ".join(current))
+                current = []
+            current.append(term)
+        if current:
+            queries.append(" OR ".join(current))
+        return queries
+    
+    def fetch_disaster_news_combined(self, days_back=7, max_pages=5, page_size=100, progress=None):
+        """Fetch disaster news with combined OR queries and classify articles locally"""
+        from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+        to_date = datetime.now().strftime('%Y-%m-%d')
+        articles_by_url = {}
+        request_count = 0
+        stopped = False
+        
+        with self._archive_writer() as archive_writer:
+            for query in self.build_combined_queries():
+                if stopped:
+                    break
+                for page in range(1, max_pages + 1):
+                    print(f"Fetching combined query page {page}")
+                    try:
+                        params = {
+                            'q': query,
+                            'from_param': from_date,
+                            'to': to_date,
+                            'language': 'en',
+                            'sort_by': 'publishedAt',
+                            'page_size': page_size,
+                            'page': page
+                        }
+                        response = self.newsapi.get_everything(**params)
+                        request_count += 1
+                    except Exception as e:
+                        # Plans with a result cap raise once the last allowed page is passed
+                        print(f"Error fetching combined query page {page}: {str(e)}")
+                        break
+                    
+                    if response['status'] != 'ok':
+                        print(f"Error fetching combined query page {page}: {response['status']}")
+                        break
+                    
+                    if archive_writer:
+                        archive_writer.write('combined', params, response, mode='combined')
+                    
                     for article in response['articles']:
-                        article['disaster_type'] = keyword
-                    all_articles.extend(response['articles'])
-                    print(f"Found {len(response['articles'])} articles for {keyword}")
-                else:
-                    print(f"Error fetching articles for {keyword}: {response['status']}")
+                        if article.get('url'):
+                            articles_by_url[article['url']] = article
                     
-            except Exception as e:
-                print(f"Error fetching articles for {keyword}: {str(e)}")
+                    if progress and progress(len(articles_by_url)) is False:
+                        print("Fetching stopped early")
+                        stopped = True
+                        break
+                    
+                    if not response['articles'] or page * page_size >= response.get('totalResults', 0):
+                        break
         
-        print(f"Total articles collected: {len(all_articles)}")
+        all_articles = []
+        for article in articles_by_url.values():
+            disaster_types = self.classifier.classify(article)
+            if not disaster_types:
+                continue
+            article['disaster_type'] = disaster_types[0]
+            article['disaster_types'] = disaster_types
+            all_articles.append(article)
+        
+        print(f"Total articles collected: {len(all_articles)} ({request_count} API requests)")
         return all_articles
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+import gzip
+import json
+import os
+import re
+import uuid
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .disaster_classifier import DisasterClassifier
+
+ARCHIVE_DIR = os.getenv('RAW_ARCHIVE_DIR', os.path.join('data', 'raw_archive'))
+EXTENSIONS = {'zstd': '.jsonl.zst', 'gzip': '.jsonl.gz'}
+
+# Keyword that combined-query responses are archived under; their articles are
+# classified on replay, so they may belong to any keyword
+COMBINED_KEYWORD = 'combined'
+
+def _segment_codec(path):
+    """Codec of a finished segment, from its extension"""
+    return 'zstd' if path.endswith(EXTENSIONS['zstd']) else 'gzip'
+
+def _open_segment(path, mode, codec):
+    """Open a compressed JSONL segment in text mode with the given codec"""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        return zstandard.open(path, mode, encoding='utf-8')
+    return gzip.open(path, mode, encoding='utf-8')
+
+def _slug(keyword):
+    return re.sub(r'[^a-z0-9]+', '-', keyword.lower()).strip('-') or 'all'
+
+class ArchiveWriter:
+    """Writes one segment per (date, keyword) partition for the duration of a collection run"""
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.run_id = f"{datetime.now():%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.segments = {}
+
+    def write(self, keyword, params, response, mode='keyword'):
+        fetched_at = datetime.now()
+        partition = (fetched_at.strftime('%Y-%m-%d'), _slug(keyword))
+
+        if partition not in self.segments:
+            directory = os.path.join(self.archive.base_dir, f"date={partition[0]}", f"keyword={partition[1]}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, self.run_id + EXTENSIONS[self.archive.compression])
+            # Write under a temporary name so readers never see a half-written segment
+            self.segments[partition] = (path, _open_segment(path + '.part', 'wt', self.archive.compression))
+
+        record = {
+            'fetched_at': fetched_at.isoformat(),
+            'keyword': keyword,
+            'mode': mode,
+            'params': params,
+            'response': response
+        }
+        self.segments[partition][1].write(json.dumps(record) + '\n')
+
+    def close(self):
+        for path, f in self.segments.values():
+            f.close()
+            os.replace(path + '.part', path)
+        self.segments = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class RawArchive:
+    """Append-only archive of raw NewsAPI responses as compressed JSONL segments partitioned by date and keyword"""
+
+    def __init__(self, base_dir=None, compression=None):
+        self.base_dir = base_dir or ARCHIVE_DIR
+        self.compression = compression or ('zstd' if zstandard else 'gzip')
+
+    def writer(self):
+        return ArchiveWriter(self)
+
+    def iter_segments(self, start_date=None, end_date=None, keywords=None):
+        """Segment paths in date order, limited to the given date range (YYYY-MM-DD) and keywords"""
+        if not os.path.isdir(self.base_dir):
+            return
+
+        keyword_slugs = {_slug(keyword) for keyword in keywords} if keywords else None
+
+        for date_dir in sorted(os.listdir(self.base_dir)):
+            date = date_dir.split('=', 1)[-1]
+            if (start_date and date < start_date) or (end_date and date > end_date):
+                continue
+
+            date_path = os.path.join(self.base_dir, date_dir)
+            for keyword_dir in sorted(os.listdir(date_path)):
+                if keyword_slugs and keyword_dir.split('=', 1)[-1] not in keyword_slugs:
+                    continue
+
+                keyword_path = os.path.join(date_path, keyword_dir)
+                for name in sorted(os.listdir(keyword_path)):
+                    if name.endswith(tuple(EXTENSIONS.values())):
+                        yield os.path.join(keyword_path, name)
+
+    def iter_records(self, start_date=None, end_date=None, keywords=None):
+        """Stream archived response records one line at a time"""
+        for path in self.iter_segments(start_date, end_date, keywords):
+            with _open_segment(path, 'rt', _segment_codec(path)) as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def iter_articles(self, start_date=None, end_date=None, keywords=None):
+        """Stream archived articles labelled with disaster_type as the collector would have"""
+        classifier = DisasterClassifier()
+        seen_urls = set()
+
+        # Combined-query segments hold articles of every type, so they are read for
+        # any keyword and filtered on the classified type instead of the directory
+        segment_keywords = list(keywords) + [COMBINED_KEYWORD] if keywords else None
+        type_filter = set(keywords) if keywords and COMBINED_KEYWORD not in keywords else None
+
+        for record in self.iter_records(start_date, end_date, segment_keywords):
+            for article in record['response'].get('articles', []):
+                if article.get('url') in seen_urls:
+                    continue
+
+                if record.get('mode') == 'combined':
+                    disaster_types = classifier.classify(article)
+                    if not disaster_types:
+                        continue
+                    if type_filter and not type_filter.intersection(disaster_types):
+                        continue
+                    article['disaster_type'] = disaster_types[0]
+                    article['disaster_types'] = disaster_types
+                else:
+                    article['disaster_type'] = record['keyword']
+
+                seen_urls.add(article.get('url'))
+                yield article
@@ -0,0 +1,199 @@
+import bisect
+import heapq
+import math
+import re
+import sys
+import time
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in', 'is',
+    'it', 'its', 'of', 'on', 'or', 'that', 'the', 'to', 'was', 'were', 'with'
+}
+
+# Field weights mirror the MongoDB text index weights
+FIELD_WEIGHTS = {'title': 5, 'locations': 3, 'description': 1}
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+def event_fields(event):
+    """Searchable text of an event document, by field"""
+    return {
+        'title': event.get('title') or '',
+        'locations': " ".join(loc.get('name', '') for loc in event.get('locations', [])),
+        'description': event.get('description') or ''
+    }
+
+# Impacts are recomputed once the average document length drifts this far from
+# the one they were computed with; until then scores use the older average
+NORM_DRIFT = 0.1
+
+# Postings read per term between checks of the top-k stopping bound
+SEARCH_BLOCK = 256
+
+class BM25Index:
+    """In-memory inverted index with BM25 ranking, used where MongoDB text search is unavailable
+
+    Besides the term frequencies, each term keeps the length-normalised part of its
+    BM25 score per document and its documents in order of it, so top-k queries can
+    stop reading postings early (Fagin's threshold algorithm).
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_lengths = {}
+        self.doc_meta = {}
+        self.total_length = 0
+        self.impacts = {}
+        self.ranked = {}
+        self.norm_length = None
+        self.pending = []
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, doc_id, event):
+        """Index an event; meta keeps the fields needed to apply page filters"""
+        if doc_id in self.doc_lengths:
+            return
+
+        term_frequencies = {}
+        for field, text in event_fields(event).items():
+            for token in tokenize(text):
+                term_frequencies[token] = term_frequencies.get(token, 0) + FIELD_WEIGHTS[field]
+
+        length = sum(term_frequencies.values())
+        for token, frequency in term_frequencies.items():
+            self.postings.setdefault(token, {})[doc_id] = frequency
+
+        self.doc_lengths[doc_id] = length
+        self.doc_meta[doc_id] = (event.get('disaster_type'), event.get('publishedAt') or '')
+        self.total_length += length
+        self.pending.append((doc_id, term_frequencies))
+
+    def _impact(self, frequency, length):
+        norm = self.k1 * (1 - self.b + self.b * length / self.norm_length)
+        return frequency * (self.k1 + 1) / (frequency + norm)
+
+    def prepare(self):
+        """Compute impacts for documents added since the last call; cheap when few were added"""
+        if not self.pending:
+            return
+
+        average_length = self.total_length / len(self.doc_lengths)
+        if self.norm_length is None or abs(average_length - self.norm_length) > NORM_DRIFT * self.norm_length:
+            self.norm_length = average_length
+            self.impacts = {}
+            for token, postings in self.postings.items():
+                impacts = {doc_id: self._impact(frequency, self.doc_lengths[doc_id])
+                           for doc_id, frequency in postings.items()}
+                self.impacts[token] = impacts
+                self.ranked[token] = sorted(impacts, key=impacts.get)
+        else:
+            for doc_id, term_frequencies in self.pending:
+                length = self.doc_lengths[doc_id]
+                for token, frequency in term_frequencies.items():
+                    impacts = self.impacts.setdefault(token, {})
+                    impacts[doc_id] = self._impact(frequency, length)
+                    bisect.insort(self.ranked.setdefault(token, []), doc_id, key=impacts.get)
+        self.pending = []
+
+    def search(self, query, matches=None, limit=None):
+        """Doc ids ranked by BM25 score; matches(disaster_type, publishedAt) filters candidates"""
+        if not self.doc_lengths:
+            return []
+        self.prepare()
+
+        doc_count = len(self.doc_lengths)
+        terms = []
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if postings:
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                terms.append((idf, self.impacts[token], self.ranked[token]))
+
+        def score(doc_id):
+            return sum(idf * impacts.get(doc_id, 0.0) for idf, impacts, _ in terms)
+
+        if limit is None:
+            candidates = {doc_id for _, impacts, _ in terms for doc_id in impacts}
+            if matches:
+                candidates = [doc_id for doc_id in candidates if matches(*self.doc_meta[doc_id])]
+            return sorted(candidates, key=score, reverse=True)
+
+        # Read every term's documents from its highest impact down, scoring each new
+        # document in full. A document not seen yet scores at most the sum of the
+        # impacts under the cursors, so stop once that cannot beat the top results.
+        top = []
+        seen = set()
+        cursors = [len(ranked) for _, _, ranked in terms]
+        while limit > 0:
+            bound = 0.0
+            for i, (idf, impacts, ranked) in enumerate(terms):
+                if cursors[i]:
+                    bound += idf * impacts[ranked[cursors[i] - 1]]
+            if not bound or (len(top) == limit and bound <= top[0][0]):
+                break
+
+            for i, (_, _, ranked) in enumerate(terms):
+                # Advance a block at a time so the bound is not recomputed per document
+                block = ranked[max(cursors[i] - SEARCH_BLOCK, 0):cursors[i]]
+                cursors[i] -= len(block)
+                for doc_id in reversed(block):
+                    if doc_id in seen:
+                        continue
+                    seen.add(doc_id)
+                    if matches and not matches(*self.doc_meta[doc_id]):
+                        continue
+
+                    entry = (score(doc_id), -len(seen), doc_id)
+                    if len(top) < limit:
+                        heapq.heappush(top, entry)
+                    elif entry[0] > top[0][0]:
+                        heapq.heapreplace(top, entry)
+
+        return [doc_id for _, _, doc_id in sorted(top, reverse=True)]
+
+if __name__ == "__main__":
+    # Benchmark building and querying the index with events shaped like loadtest.py's seed
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    places = [("Tokyo", "Japan"), ("Manila", "Philippines"), ("Santiago", "Chile"),
+              ("Los Angeles", "United States"), ("Jakarta", "Indonesia"), ("Kerala", "India"),
+              ("Izmir", "Turkey"), ("Queensland", "Australia")]
+    disaster_types = ["earthquake", "flood", "hurricane", "tsunami", "wildfire",
+                      "tornado", "cyclone", "landslide", "volcano", "drought"]
+    print(f"Benchmarking with {count} events")
+
+    index = BM25Index()
+    start = time.perf_counter()
+    for i in range(count):
+        name, country = places[i % len(places)]
+        disaster_type = disaster_types[i % len(disaster_types)]
+        index.add(i, {
+            "title": f"Load test {disaster_type} report {i} near {name}",
+            "description": f"Synthetic {disaster_type} event in {name}, {country}",
+            "locations": [{"name": name}],
+            "disaster_type": disaster_type,
+            "publishedAt": f"2030-01-{1 + i % 28:02d}T00:00:00Z"
+        })
+    print(f"Add: {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    index.prepare()
+    print(f"Prepare: {time.perf_counter() - start:.2f}s")
+
+    def flood_in_january(disaster_type, published_at):
+        return disaster_type == "flood" and published_at >= "2030-01-15"
+
+    for query, matches in [("japan", None), ("synthetic flood report", None),
+                           ("kerala landslide", None), ("chile", flood_in_january)]:
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            index.search(query, matches, limit=21)
+            timings.append(time.perf_counter() - start)
+        label = query + (" (filtered)" if matches else "")
+        print(f"Search {label!r}: best {min(timings) * 1000:.1f} ms, worst {max(timings) * 1000:.1f} ms")